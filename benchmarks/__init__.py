@@ -0,0 +1 @@
+"""Offline benchmarks for the dashboard data paths, see benchmarks/run.py"""
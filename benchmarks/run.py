@@ -0,0 +1,279 @@
+"""Run the dashboard benchmarks and compare them with stored baselines.
+
+    python -m benchmarks.run                      # every case at 1, 100 and 10000 items
+    python -m benchmarks.run --scale 100 --case list_students
+    python -m benchmarks.run --update             # record the results as the new baselines
+
+Each case runs against a cold cache and a mocked transport, and reports
+median wall time, API round trips, response bytes parsed and peak traced
+memory. The exit status is 1 if any result regressed past its tolerance.
+"""
+
+import argparse
+import base64
+import importlib.util
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAGE = os.path.join(ROOT, "pages", "2_instructor.py")
+BASELINES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+WORKDIR = tempfile.mkdtemp(prefix="eduflow-bench-")
+
+# eduflow reads its settings at import time: point it at a private cache and
+# credential store, and turn off throttling, coalescing, prefetching and the
+# metrics endpoint so only the code paths themselves are measured
+os.environ.update({
+    "EDUFLOW_CACHE_PATH": os.path.join(WORKDIR, "cache.sqlite3"),
+    "EDUFLOW_CREDENTIALS_DIR": os.path.join(WORKDIR, "credentials"),
+    "EDUFLOW_SECRET_KEY": base64.urlsafe_b64encode(os.urandom(32)).decode(),
+    "EDUFLOW_USER_QPS": "1e9",
+    "EDUFLOW_USER_BURST": "1e9",
+    "EDUFLOW_PROJECT_QPS": "1e9",
+    "EDUFLOW_PROJECT_BURST": "1e9",
+    "EDUFLOW_COALESCE_WINDOW": "0",
+    "EDUFLOW_PREFETCH_DEPTH": "0",
+    "EDUFLOW_METRICS_PORT": "0",
+})
+sys.path.insert(0, ROOT)
+
+from benchmarks.transport import Dataset, MockAdapter, MockTransport  # noqa: E402
+from eduflow import lazy, transport as pooled  # noqa: E402
+from eduflow.cache import cache  # noqa: E402
+from eduflow.credentials import store as credential_store  # noqa: E402
+from eduflow.invitations import send_invitations  # noqa: E402
+from eduflow.profile import get_profile  # noqa: E402
+from eduflow.services import classroom_service  # noqa: E402
+
+SCALES = [1, 100, 10000]
+# The id the mock userinfo endpoint answers with
+USER_ID = "104000000000000000001"
+# Allowed growth over the baseline before a result counts as a regression
+TOLERANCE = {"wall_s": 0.5, "calls": 0.0, "bytes": 0.05, "peak_kb": 0.25}
+# ...and by at least this much, so noise on tiny numbers isn't reported
+MIN_GROWTH = {"wall_s": 0.02, "peak_kb": 512}
+
+
+class Env:
+    """What a case needs: the page module, a service and the dataset"""
+
+    def __init__(self, transport, dataset):
+        self.transport = transport
+        self.dataset = dataset
+        self.page = load_page()
+        self.creds = credential_store.get(USER_ID)
+        self.service = classroom_service(self.creds, USER_ID)
+        self.course = dataset.courses[0] if dataset.courses else {"id": "600000000000", "name": "Empty"}
+
+
+def install(transport):
+    """Answer every request sent over eduflow's connection pool from transport"""
+    pooled.session().mount("https://", MockAdapter(transport))
+
+
+def sign_in():
+    creds = lazy.user_credentials()(
+        token="benchmark", refresh_token="benchmark", client_id="benchmark",
+        client_secret="benchmark", token_uri="https://oauth2.googleapis.com/token",
+        expiry=datetime.utcnow() + timedelta(days=1),
+    )
+    # Resolved once per session in the app, keep it out of the per-case counts
+    profile = get_profile(creds)
+    credential_store.put(profile["id"], creds, email=profile["email"])
+
+
+_page_module = None
+
+
+def load_page():
+    """The instructor page as a module, without running main()"""
+    global _page_module
+    if _page_module is None:
+        spec = importlib.util.spec_from_file_location("instructor_page", PAGE)
+        _page_module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(_page_module)
+    return _page_module
+
+
+# ===== CASES =====
+# A case prepares its state and returns the callable that is measured.
+def case_list_courses(env):
+    def run():
+        courses = env.page.list_courses(env.service)
+        while not courses.exhausted:
+            courses.load_more()
+    return run
+
+
+def case_list_students(env):
+    def run():
+        students = env.page.list_students(env.service, env.course["id"], page_size=env.page.ROSTER_FETCH_SIZE)
+        while not students.exhausted:
+            students.load_more()
+    return run
+
+
+def case_list_announcements(env):
+    def run():
+        feed = env.page.list_announcements(env.service, env.course["id"])
+        feed.ensure_loaded()
+        while not feed.exhausted:
+            feed.load_more()
+        feed.frame()
+    return run
+
+
+def case_send_invitations(env):
+    return lambda: send_invitations(env.service, env.course["id"], env.dataset.emails)
+
+
+def app(env, **state):
+    from streamlit.testing.v1 import AppTest
+    at = AppTest.from_file(PAGE, default_timeout=600)
+    at.session_state["user_id"] = USER_ID
+    for key, value in state.items():
+        at.session_state[key] = value
+    return at
+
+
+def checked(target):
+    """Run an AppTest (or the one a clicked widget belongs to), failing on errors"""
+    at = target.run()
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+    return at
+
+
+def case_page_course_list(env):
+    at = app(env)
+    return lambda: checked(at)
+
+
+def case_page_course_table(env):
+    at = app(env, course_table_mode=True)
+    return lambda: checked(at)
+
+
+def case_page_course_detail(env):
+    at = app(env, current_course=env.course)
+    return lambda: checked(at)
+
+
+def case_page_add_students(env):
+    section = {f"detail_section_{env.course['id']}": "Students"}
+    at = checked(app(env, current_course=env.course, **section))
+    next(t for t in at.text_area if t.label.startswith("Enter student emails")).input(
+        "\n".join(env.dataset.emails)
+    )
+    button = next(b for b in at.button if b.label == "Send Invitations")
+    return lambda: checked(button.click())
+
+
+CASES = {name[5:]: case for name, case in globals().items() if name.startswith("case_")}
+
+
+# ===== MEASUREMENT =====
+def reset(transport):
+    cache.clear()
+    transport.reset()
+
+
+def measure(case, env, repeat):
+    """Median wall time over repeat runs, plus calls, bytes and peak memory"""
+    times = []
+    for _ in range(repeat):
+        reset(env.transport)
+        run = case(env)
+        env.transport.reset()
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+    result = {"wall_s": round(statistics.median(times), 4), **env.transport.stats()}
+    # Memory is traced in a separate run, tracing slows everything down
+    reset(env.transport)
+    run = case(env)
+    tracemalloc.start()
+    try:
+        run()
+        result["peak_kb"] = round(tracemalloc.get_traced_memory()[1] / 1024)
+    finally:
+        tracemalloc.stop()
+    return result
+
+
+def compare(result, baseline):
+    """Metrics that grew past their tolerance, as readable strings"""
+    if not baseline:
+        return []
+    regressions = []
+    for metric, tolerance in TOLERANCE.items():
+        old, new = baseline.get(metric), result.get(metric)
+        if old is None or new is None:
+            continue
+        if new > old * (1 + tolerance) and new - old > MIN_GROWTH.get(metric, 0):
+            regressions.append(f"{metric} {old} -> {new}")
+    return regressions
+
+
+def load_baselines(path=BASELINES):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the dashboard data paths offline")
+    parser.add_argument("--scale", type=int, action="append", help="items per list (default 1, 100, 10000)")
+    parser.add_argument("--case", action="append", choices=sorted(CASES), help="cases to run (default all)")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per case (default 3)")
+    parser.add_argument("--baselines", default=BASELINES, help="baselines JSON file")
+    parser.add_argument("--update", action="store_true", help="store the results as the new baselines")
+    args = parser.parse_args(argv)
+
+    # Import costs belong to startup, not to whichever case runs first
+    for name in lazy.HEAVY_MODULES:
+        lazy.module(name)
+    transport = MockTransport()
+    install(transport)
+    sign_in()
+    baselines = load_baselines(args.baselines)
+    results, failed = {}, False
+
+    print(f"{'case':<22}{'scale':>7}{'wall ms':>11}{'calls':>8}{'bytes':>12}{'peak KiB':>10}  vs baseline")
+    for scale in args.scale or SCALES:
+        transport.dataset = Dataset(scale)
+        env = Env(transport, transport.dataset)
+        for name in args.case or CASES:
+            key = f"{name}@{scale}"
+            result = results[key] = measure(CASES[name], env, args.repeat)
+            regressions = compare(result, baselines.get(key))
+            failed = failed or bool(regressions)
+            if regressions:
+                verdict = "REGRESSED: " + ", ".join(regressions)
+            elif key in baselines:
+                verdict = f"ok ({result['wall_s'] / max(baselines[key]['wall_s'], 1e-9) - 1:+.0%} time)"
+            else:
+                verdict = "no baseline"
+            print(f"{name:<22}{scale:>7}{result['wall_s'] * 1000:>11.1f}{result['calls']:>8}"
+                  f"{result['bytes']:>12}{result['peak_kb']:>10}  {verdict}")
+
+    if args.update:
+        baselines.update(results)
+        with open(args.baselines, "w") as f:
+            json.dump(dict(sorted(baselines.items())), f, indent=2)
+            f.write("\n")
+        print(f"Baselines written to {args.baselines}")
+        return 0
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,252 @@
+"""Mocked Google API transport for the benchmarks.
+
+``MockTransport`` stands in for the httplib2.Http object the API client
+sends requests through. It answers the Classroom and OAuth2 calls the
+dashboard makes from a generated ``Dataset``, honouring page sizes, page
+tokens, ``fields`` masks and batch requests like the real API, and counts
+round trips and response bytes. ``MockAdapter`` mounts it under a
+requests.Session, below eduflow's pooled transport.
+"""
+
+import email.parser
+import json
+import re
+import threading
+import urllib.parse
+from collections import Counter
+from datetime import datetime, timedelta
+
+import httplib2
+import requests
+from requests.structures import CaseInsensitiveDict
+
+LOREM = (
+    "Please read chapter four before Thursday and bring your lab notebook. "
+    "Office hours move to room 204 this week; the quiz on recursion is open "
+    "until Sunday night and covers everything from the last two lectures. "
+)
+
+
+NEWEST = datetime(2024, 6, 1, 12, 0, 0)
+
+
+def _time(i):
+    # Distinct RFC 3339 timestamps, newest for i = 0
+    return (NEWEST - timedelta(seconds=i * 37, milliseconds=i % 1000)).isoformat(timespec="milliseconds") + "Z"
+
+
+class Dataset:
+    """Realistic Classroom payloads with size items of each kind"""
+
+    def __init__(self, size):
+        self.size = size
+        self.courses = [self._course(i) for i in range(size)]
+        self.students = [self._student(i) for i in range(size)]
+        self.announcements = [self._announcement(i) for i in range(size)]
+        self.emails = [f"student{i}@example.edu" for i in range(size)]
+
+    def _course(self, i):
+        course_id = str(600000000000 + i)
+        return {
+            "id": course_id,
+            "name": f"Course {i}: Introduction to Computer Science",
+            "section": f"Section {i % 7 + 1}",
+            "descriptionHeading": f"Welcome to Course {i}",
+            "description": LOREM[: 60 + i % 140],
+            "room": f"Building {chr(65 + i % 6)}, Room {100 + i % 300}",
+            "ownerId": "104000000000000000001",
+            "creationTime": _time(i + 1000),
+            "updateTime": _time(i),
+            "enrollmentCode": f"abc{i:05d}",
+            "courseState": "ACTIVE" if i % 5 else "ARCHIVED",
+            "alternateLink": f"https://classroom.google.com/c/{course_id}",
+            "teacherGroupEmail": f"course_{i}_teachers@example.edu",
+            "courseGroupEmail": f"course_{i}@example.edu",
+            "teacherFolder": {
+                "id": f"0B{i:030d}",
+                "title": f"Course {i}",
+                "alternateLink": f"https://drive.google.com/drive/folders/0B{i:030d}",
+            },
+            "guardiansEnabled": False,
+            "calendarId": f"c_{i:040d}@group.calendar.google.com",
+            "gradebookSettings": {"calculationType": "TOTAL_POINTS", "displaySetting": "SHOW_OVERALL_GRADE"},
+        }
+
+    def _student(self, i):
+        user_id = str(105000000000000000000 + i)
+        return {
+            "courseId": "600000000000",
+            "userId": user_id,
+            "profile": {
+                "id": user_id,
+                "name": {"givenName": f"Student{i}", "familyName": "Example", "fullName": f"Student{i} Example"},
+                "emailAddress": f"student{i}@example.edu",
+                "photoUrl": f"//lh3.googleusercontent.com/a/photo{i:020d}",
+                "permissions": [{"permission": "CREATE_COURSE"}],
+                "verifiedTeacher": False,
+            },
+            "studentWorkFolder": {
+                "id": f"1A{i:030d}",
+                "title": f"Student{i} Example - Course 0",
+                "alternateLink": f"https://drive.google.com/drive/folders/1A{i:030d}",
+            },
+        }
+
+    def _announcement(self, i):
+        return {
+            "courseId": "600000000000",
+            "id": str(700000000000 + i),
+            "text": f"Announcement {i}. " + LOREM,
+            "state": "PUBLISHED",
+            "alternateLink": f"https://classroom.google.com/c/600000000000/p/{700000000000 + i}",
+            "creationTime": _time(i),
+            "updateTime": _time(i),
+            "creatorUserId": "104000000000000000001",
+            "assigneeMode": "ALL_STUDENTS",
+        }
+
+
+def parse_mask(mask):
+    """Parse a fields mask into a tree of {name: subtree or None}"""
+    tree, _ = _parse_mask(mask, 0)
+    return tree
+
+
+def _parse_mask(mask, i):
+    tree = {}
+    while i < len(mask):
+        j = i
+        while j < len(mask) and mask[j] not in ",()":
+            j += 1
+        *parents, leaf = mask[i:j].strip().split("/")
+        node = tree
+        for name in parents:
+            if node.get(name) is None:
+                node[name] = {}
+            node = node[name]
+        if j < len(mask) and mask[j] == "(":
+            sub, j = _parse_mask(mask, j + 1)
+            node[leaf] = dict(node.get(leaf) or {}, **sub)
+        elif leaf:
+            node.setdefault(leaf, None)
+        if j < len(mask) and mask[j] == ")":
+            return tree, j + 1
+        i = j + 1
+    return tree, i
+
+
+def project(value, tree):
+    """Keep only the parts of value selected by a mask tree"""
+    if tree is None:
+        return value
+    if isinstance(value, list):
+        return [project(v, tree) for v in value]
+    if isinstance(value, dict):
+        return {k: project(value[k], sub) for k, sub in tree.items() if k in value}
+    return value
+
+
+def _page(items, key, query, default_size=30):
+    size = int(query.get("pageSize", [default_size])[0]) or default_size
+    start = int(query.get("pageToken", ["0"])[0] or 0)
+    response = {key: items[start:start + size]}
+    if start + size < len(items):
+        response["nextPageToken"] = str(start + size)
+    return response
+
+
+class MockTransport:
+    """httplib2.Http stand-in serving a Dataset"""
+
+    def __init__(self, dataset=None):
+        self.dataset = dataset or Dataset(1)
+        self.credentials = None
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Zero the call and byte counters"""
+        with self._lock:
+            self.calls = Counter()
+            self.bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {"calls": sum(self.calls.values()), "bytes": self.bytes}
+
+    def request(self, uri, method="GET", body=None, headers=None, redirections=5, connection_type=None):
+        url = urllib.parse.urlparse(uri)
+        query = urllib.parse.parse_qs(url.query)
+        if url.path.startswith("/batch"):
+            endpoint = "batch"
+            status, content, ctype = self._batch(body, headers)
+        else:
+            endpoint, status, data = self._route(method, url.path, query, body)
+            if status == 200 and "fields" in query:
+                data = project(data, parse_mask(query["fields"][0]))
+            content, ctype = json.dumps(data).encode("utf-8"), "application/json"
+        with self._lock:
+            self.calls[endpoint] += 1
+            self.bytes += len(content)
+        return httplib2.Response({"status": status, "content-type": ctype}), content
+
+    def _route(self, method, path, query, body):
+        data = self.dataset
+        payload = json.loads(body) if body else {}
+        if path.endswith("/userinfo"):
+            return "userinfo", 200, {"id": "104000000000000000001", "email": "teacher@example.edu",
+                                     "name": "Bench Teacher", "picture": "https://example.edu/t.png"}
+        if re.search(r"/v1/courses$", path):
+            if method == "GET":
+                return "courses.list", 200, _page(data.courses, "courses", query)
+            return "courses.create", 200, dict(payload, id=str(699999999999), courseState="PROVISIONED")
+        if re.search(r"/v1/courses/[^/]+/students$", path):
+            return "students.list", 200, _page(data.students, "students", query)
+        if re.search(r"/v1/courses/[^/]+/announcements$", path):
+            if method == "GET":
+                return "announcements.list", 200, _page(data.announcements, "announcements", query)
+            return "announcements.create", 200, dict(payload, id="799999999999", updateTime=_time(0))
+        if re.search(r"/v1/courses/[^/]+$", path):
+            return "courses.get", 200, data.courses[0] if data.courses else {}
+        if path.endswith("/v1/invitations"):
+            return "invitations.create", 200, dict(payload, id="inv")
+        return "unknown", 404, {"error": {"code": 404, "message": "Not found", "status": "NOT_FOUND"}}
+
+    def _batch(self, body, headers):
+        text = body.decode("utf-8") if isinstance(body, bytes) else body
+        message = email.parser.Parser().parsestr(f"Content-Type: {headers['content-type']}\r\n\r\n{text}")
+        parts = []
+        for part in message.get_payload():
+            request_line, rest = part.get_payload().split("\n", 1)
+            method, uri, _ = request_line.split(" ")
+            inner_body = re.split(r"\r?\n\r?\n", rest, 1)[-1].strip() or None
+            endpoint, status, data = self._route(method, urllib.parse.urlparse(uri).path, {}, inner_body)
+            parts.append(
+                "--BATCH\r\nContent-Type: application/http\r\n"
+                f"Content-ID: <response-{part['Content-ID'].strip('<>')}>\r\n\r\n"
+                f"HTTP/1.1 {status} OK\r\nContent-Type: application/json\r\n\r\n{json.dumps(data)}\r\n"
+            )
+        content = ("".join(parts) + "--BATCH--").encode("utf-8")
+        return 200, content, "multipart/mixed; boundary=BATCH"
+
+
+class MockAdapter(requests.adapters.BaseAdapter):
+    """requests adapter that answers from a MockTransport instead of the network"""
+
+    def __init__(self, transport):
+        super().__init__()
+        self.transport = transport
+
+    def send(self, request, **kwargs):
+        resp, content = self.transport.request(request.url, request.method, request.body, request.headers)
+        response = requests.Response()
+        response.status_code = resp.status
+        response.headers = CaseInsensitiveDict(resp)
+        response._content = content
+        response.encoding = "utf-8"
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
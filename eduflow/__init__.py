@@ -0,0 +1 @@
+"""Shared backend helpers for the EduFlow Streamlit pages"""
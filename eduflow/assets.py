@@ -0,0 +1,156 @@
+"""Local cache for remote JSON assets such as Lottie animations.
+
+Lookups never touch the network: an asset is served from memory or from
+the on-disk cache. Anything missing is fetched by a background worker with
+strict timeouts and is available from the next rerun on; until then pages
+show one of the stand-ins bundled in assets/lottie.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BUNDLE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "assets", "lottie")
+CACHE_DIR = os.environ.get("EDUFLOW_ASSET_CACHE", os.path.join(".eduflow", "assets"))
+MAX_CACHE_BYTES = int(os.environ.get("EDUFLOW_ASSET_CACHE_BYTES", str(20 * 1024 * 1024)))
+# (connect, read) seconds for background fetches
+FETCH_TIMEOUT = (2, 5)
+# Seconds before a failed URL is tried again
+RETRY_AFTER = 300
+
+
+class AssetCache:
+    """Content-addressed, LRU-evicted disk cache of JSON assets by URL"""
+
+    def __init__(self, cache_dir=CACHE_DIR, bundle_dir=BUNDLE_DIR, max_bytes=MAX_CACHE_BYTES):
+        self.cache_dir = cache_dir
+        self.bundle_dir = bundle_dir
+        self.max_bytes = max_bytes
+        self._memory = {}
+        self._pending = set()
+        self._failed = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="eduflow-assets")
+
+    def _index_path(self):
+        return os.path.join(self.cache_dir, "index.json")
+
+    def _read_index(self):
+        try:
+            with open(self._index_path()) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _write_index(self, index):
+        fd, tmp = tempfile.mkstemp(dir=self.cache_dir)
+        with os.fdopen(fd, "w") as f:
+            json.dump(index, f)
+        os.replace(tmp, self._index_path())
+
+    def _load_local(self, url):
+        digest = self._read_index().get(url)
+        if digest is None:
+            return None
+        path = os.path.join(self.cache_dir, digest + ".json")
+        try:
+            with open(path, "rb") as f:
+                data = json.loads(f.read())
+        except (FileNotFoundError, ValueError):
+            return None
+        os.utime(path)  # mark as recently used for eviction
+        return data
+
+    def get(self, url):
+        """Parsed asset for url, or None while it is being fetched in the background"""
+        with self._lock:
+            if url in self._memory:
+                return self._memory[url]
+        data = self._load_local(url)
+        if data is None:
+            self.prefetch(url)
+            return None
+        with self._lock:
+            self._memory[url] = data
+        return data
+
+    def bundled(self, name):
+        """Parsed stand-in shipped in assets/lottie, shown until the real asset is fetched"""
+        path = os.path.join(self.bundle_dir, name)
+        with self._lock:
+            if path in self._memory:
+                return self._memory[path]
+        with open(path, "rb") as f:
+            data = json.loads(f.read())
+        with self._lock:
+            self._memory[path] = data
+        return data
+
+    def prefetch(self, url):
+        """Fetch url in the background unless it is already on its way"""
+        with self._lock:
+            if url in self._pending or url in self._memory:
+                return
+            if time.monotonic() - self._failed.get(url, -RETRY_AFTER) < RETRY_AFTER:
+                return
+            self._pending.add(url)
+        self._pool.submit(self._fetch, url)
+
+    def _fetch(self, url):
+        import requests
+        try:
+            response = requests.get(url, timeout=FETCH_TIMEOUT)
+            response.raise_for_status()
+            content = response.content
+            data = json.loads(content)
+            self._store(url, content)
+            with self._lock:
+                self._memory[url] = data
+        except Exception:
+            with self._lock:
+                self._failed[url] = time.monotonic()
+        finally:
+            with self._lock:
+                self._pending.discard(url)
+
+    def _store(self, url, content):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        digest = hashlib.sha256(content).hexdigest()
+        path = os.path.join(self.cache_dir, digest + ".json")
+        if not os.path.exists(path):
+            fd, tmp = tempfile.mkstemp(dir=self.cache_dir)
+            with os.fdopen(fd, "wb") as f:
+                f.write(content)
+            os.replace(tmp, path)
+        with self._lock:
+            index = self._read_index()
+            index[url] = digest
+            self._evict(index)
+            self._write_index(index)
+
+    def _evict(self, index):
+        """Remove least recently used files until the cache fits its budget"""
+        files = []
+        for digest in set(index.values()):
+            path = os.path.join(self.cache_dir, digest + ".json")
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, digest, path))
+        total = sum(size for _, size, _, _ in files)
+        for _, size, digest, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
+            for url in [u for u, d in index.items() if d == digest]:
+                del index[url]
+                self._memory.pop(url, None)
+
+
+assets = AssetCache()
@@ -0,0 +1,122 @@
+"""Persistent per-user cache of Classroom objects.
+
+Entries live in a SQLite database in WAL mode so concurrent sessions can
+read while another writes, and survive a restart of the Streamlit server.
+Expired entries are kept until they pass their kind's stale limit, so a
+page can show them at once while it fetches fresh ones in the background.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+
+CACHE_PATH = os.environ.get("EDUFLOW_CACHE_PATH", os.path.join(".eduflow", "cache.sqlite3"))
+
+# Seconds each resource type stays fresh
+TTLS = {
+    "courses": 300,
+    "course": 600,
+    "students": 300,
+    # Synced incrementally, so it can be kept much longer
+    "announcement_feed": 7 * 24 * 3600,
+}
+DEFAULT_TTL = 300
+# Seconds since an entry was stored past which it is too old to show while
+# it is refreshed; older data is fetched before the page renders
+STALE_LIMITS = {
+    "courses": 24 * 3600,
+    "students": 12 * 3600,
+    "announcement_feed": 6 * 3600,
+}
+
+# A cached value with the time it was stored and whether it is within its TTL
+Entry = namedtuple("Entry", ["value", "stored_at", "fresh"])
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    user TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    scope TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    stored_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    PRIMARY KEY (user, kind, scope, key)
+)
+"""
+
+
+class Cache:
+    """SQLite-backed cache keyed by (user, kind, scope, key)"""
+
+    def __init__(self, path=CACHE_PATH, ttls=None, stale_limits=None):
+        self.path = path
+        self.ttls = dict(TTLS, **(ttls or {}))
+        self.stale_limits = dict(STALE_LIMITS, **(stale_limits or {}))
+        self._local = threading.local()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(SCHEMA)
+            now = time.time()
+            conn.execute(
+                "DELETE FROM entries WHERE expires_at < ? AND stored_at < ?",
+                (now, now - max(self.stale_limits.values(), default=0)),
+            )
+            self._local.conn = conn
+        return conn
+
+    def get(self, user, kind, scope="", key=""):
+        """Return the cached value, or None if missing or expired"""
+        entry = self.lookup(user, kind, scope, key)
+        if entry is None or not entry.fresh:
+            return None
+        return entry.value
+
+    def lookup(self, user, kind, scope="", key=""):
+        """Return the Entry, expired or not, or None if missing or past its stale limit"""
+        row = self._conn().execute(
+            "SELECT value, stored_at, expires_at FROM entries WHERE user=? AND kind=? AND scope=? AND key=?",
+            (user, kind, str(scope), key),
+        ).fetchone()
+        if row is None:
+            return None
+        now = time.time()
+        fresh = now <= row[2]
+        if not fresh and now - row[1] > self.stale_limits.get(kind, 0):
+            return None
+        return Entry(json.loads(row[0]), row[1], fresh)
+
+    def put(self, user, kind, scope, key, value, ttl=None):
+        """Store a JSON-serialisable value"""
+        now = time.time()
+        ttl = self.ttls.get(kind, DEFAULT_TTL) if ttl is None else ttl
+        self._conn().execute(
+            "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (user, kind, str(scope), key, json.dumps(value), now, now + ttl),
+        )
+
+    def invalidate(self, user, kind, scope=None):
+        """Drop every entry of a kind for the user, optionally within one scope"""
+        if scope is None:
+            self._conn().execute("DELETE FROM entries WHERE user=? AND kind=?", (user, kind))
+        else:
+            self._conn().execute(
+                "DELETE FROM entries WHERE user=? AND kind=? AND scope=?", (user, kind, str(scope))
+            )
+
+    def clear(self):
+        """Drop every entry of every user"""
+        self._conn().execute("DELETE FROM entries")
+
+
+cache = Cache()
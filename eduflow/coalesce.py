@@ -0,0 +1,80 @@
+"""Single-flight coalescing of identical read requests"""
+
+import threading
+import time
+
+
+class _Call:
+    __slots__ = ("event", "result", "error", "finished")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        self.finished = None
+
+
+class SingleFlight:
+    """Share one response between identical in-flight or just-completed calls.
+
+    Completed results are kept for ``window`` seconds so the repeated reads a
+    single Streamlit rerun tends to make are served without a round trip.
+    Failures are never shared with later callers.
+    """
+
+    def __init__(self, window=2.0):
+        self.window = window
+        self.executed = 0
+        self.coalesced = 0
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def _fresh(self, call, now):
+        return call.finished is None or now - call.finished < self.window
+
+    def do(self, key, fn):
+        """Run fn once for key, or wait for and reuse the result of an identical call
+
+        The result object itself is handed to every caller within the window,
+        so callers must not mutate it; copy it first.
+        """
+        now = time.monotonic()
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None or not self._fresh(call, now)
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executed += 1
+            else:
+                self.coalesced += 1
+        if leader:
+            try:
+                call.result = fn()
+            except BaseException as e:
+                call.error = e
+            finally:
+                call.finished = time.monotonic()
+                with self._lock:
+                    if call.error is not None and self._calls.get(key) is call:
+                        del self._calls[key]
+                    self._purge(call.finished)
+                call.event.set()
+        else:
+            call.event.wait()
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def forget(self, prefix):
+        """Drop completed results whose key starts with prefix (e.g. after a write)"""
+        with self._lock:
+            for key in [k for k, c in self._calls.items() if k[:len(prefix)] == prefix and c.finished]:
+                del self._calls[key]
+
+    def _purge(self, now):
+        for key in [k for k, c in self._calls.items() if not self._fresh(c, now)]:
+            del self._calls[key]
+
+    def stats(self):
+        """Calls executed vs duplicates served from a shared response"""
+        return {"executed": self.executed, "coalesced": self.coalesced}
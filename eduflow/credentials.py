@@ -0,0 +1,161 @@
+"""Per-user OAuth credential store.
+
+Credentials are looked up in an in-memory hot layer first and fall back to
+one Fernet-encrypted file per user, so sessions never contend on a shared
+token file and each user's credentials are read from disk at most once.
+An encrypted alias file per sign-in email maps it to the user id, for
+command line tools that name the user by email.
+
+The key comes from ``EDUFLOW_SECRET_KEY`` or a key file kept apart from
+the encrypted files. A key generated next to them protects nothing, so it
+is only used for local development (``EDUFLOW_DEV=1``).
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+from cachetools import LRUCache
+from cryptography.fernet import Fernet, InvalidToken
+
+from eduflow import lazy
+
+logger = logging.getLogger(__name__)
+
+STORE_DIR = os.environ.get("EDUFLOW_CREDENTIALS_DIR", os.path.join(".eduflow", "credentials"))
+KEY_FILE = os.environ.get("EDUFLOW_SECRET_KEY_FILE", os.path.join(".eduflow", "secret.key"))
+# Allows a key file next to the encrypted credentials, e.g. the default one
+DEV_MODE = os.environ.get("EDUFLOW_DEV", "").lower() in ("1", "true", "yes")
+
+
+def _beside(key_file, directory):
+    """True if key_file is in directory or next to it, where whoever reads one reads the other"""
+    key_dir = os.path.dirname(os.path.realpath(key_file))
+    directory = os.path.realpath(directory)
+    return key_dir == os.path.dirname(directory) or os.path.commonpath([key_dir, directory]) == directory
+
+
+def load_key(key_file=KEY_FILE, directory=STORE_DIR, dev=DEV_MODE):
+    """Encryption key from EDUFLOW_SECRET_KEY, or a key file (generated if missing) apart from directory"""
+    key = os.environ.get("EDUFLOW_SECRET_KEY")
+    if key:
+        return key.encode()
+    if _beside(key_file, directory):
+        if not dev:
+            raise RuntimeError(
+                f"{key_file} would sit next to the encrypted credentials in {directory}. Set "
+                "EDUFLOW_SECRET_KEY, or EDUFLOW_SECRET_KEY_FILE to a path outside that directory, "
+                "or EDUFLOW_DEV=1 for local development"
+            )
+        logger.warning("Encrypting credentials with %s, next to them; set EDUFLOW_SECRET_KEY "
+                       "outside local development", key_file)
+    if not os.path.exists(key_file):
+        os.makedirs(os.path.dirname(key_file) or ".", exist_ok=True)
+        try:
+            fd = os.open(key_file, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        except FileExistsError:
+            pass
+        else:
+            with os.fdopen(fd, "wb") as f:
+                f.write(Fernet.generate_key())
+    with open(key_file, "rb") as f:
+        return f.read().strip()
+
+
+class CredentialStore:
+    """Credentials keyed by user id, cached in memory over encrypted files"""
+
+    def __init__(self, directory=STORE_DIR, key=None, max_hot=1024):
+        self.directory = directory
+        self._key = key
+        self._fernet = None
+        self._hot = LRUCache(maxsize=max_hot)
+        # user id -> time.monotonic() of the last page load that used their credentials
+        self._seen = {}
+        self._lock = threading.Lock()
+
+    def _cipher(self):
+        if self._fernet is None:
+            self._fernet = Fernet(self._key or load_key(directory=self.directory))
+        return self._fernet
+
+    def _path(self, user_id):
+        name = hashlib.sha256(user_id.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, name + ".bin")
+
+    def get(self, user_id):
+        """Credentials for user_id, or None"""
+        if not user_id:
+            return None
+        with self._lock:
+            creds = self._hot.get(user_id)
+        if creds is not None:
+            return creds
+        try:
+            with open(self._path(user_id), "rb") as f:
+                info = json.loads(self._cipher().decrypt(f.read()))
+        except (FileNotFoundError, InvalidToken, ValueError):
+            return None
+        creds = lazy.user_credentials().from_authorized_user_info(info)
+        with self._lock:
+            return self._hot.setdefault(user_id, creds)
+
+    def _write(self, path, data):
+        os.makedirs(self.directory, exist_ok=True)
+        data = self._cipher().encrypt(data)
+        # Write to a temp file and rename so readers never see a partial file
+        fd, tmp = tempfile.mkstemp(dir=self.directory)
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def put(self, user_id, creds, email=None):
+        """Save credentials for user_id, and with email, make them findable by it"""
+        with self._lock:
+            self._hot[user_id] = creds
+        self._write(self._path(user_id), creds.to_json().encode("utf-8"))
+        if email:
+            self._write(self._path("email:" + email.casefold()), user_id.encode("utf-8"))
+
+    def resolve(self, user):
+        """User id for a user id or for the email they signed in with, None if unknown"""
+        if "@" not in user:
+            return user
+        try:
+            with open(self._path("email:" + user.strip().casefold()), "rb") as f:
+                return self._cipher().decrypt(f.read()).decode("utf-8")
+        except (FileNotFoundError, InvalidToken):
+            return None
+
+    def delete(self, user_id):
+        """Forget a user's credentials (sign out)"""
+        if not user_id:
+            return
+        with self._lock:
+            self._hot.pop(user_id, None)
+            self._seen.pop(user_id, None)
+        try:
+            os.remove(self._path(user_id))
+        except FileNotFoundError:
+            pass
+
+    def touch(self, user_id):
+        """Record that user_id is using the app now"""
+        if user_id:
+            with self._lock:
+                self._seen[user_id] = time.monotonic()
+
+    def active_users(self, idle):
+        """User ids in the hot layer seen within the last idle seconds"""
+        cutoff = time.monotonic() - idle
+        with self._lock:
+            for user_id in [u for u, seen in self._seen.items() if seen < cutoff]:
+                del self._seen[user_id]
+            return [u for u in self._hot.keys() if u in self._seen]
+
+
+store = CredentialStore()
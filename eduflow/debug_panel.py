@@ -0,0 +1,118 @@
+"""Developer sidebar panel with a waterfall of the current rerun's spans"""
+
+import contextvars
+import os
+from contextlib import contextmanager
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from eduflow import lazy, tracing
+
+CATEGORY_COLORS = {
+    "rerun": "#64748b",
+    "auth": "#f59e0b",
+    "service": "#8b5cf6",
+    "api": "#2563eb",
+    "render": "#10b981",
+}
+
+# (root span, sidebar) of the trace the running rerun records into, if any
+_active = contextvars.ContextVar("eduflow_debug_trace", default=None)
+
+
+def _env_flag(name):
+    return os.environ.get(name, "").lower() in ("1", "true", "yes")
+
+
+def debug_enabled():
+    """Tracing is on with EDUFLOW_DEBUG=1, or ?debug=1 in the page URL where EDUFLOW_DEBUG_ALLOWED=1"""
+    if _env_flag("EDUFLOW_DEBUG"):
+        return True
+    # Traces show request parameters, so visitors can't switch them on in production
+    return _env_flag("EDUFLOW_DEBUG_ALLOWED") and st.query_params.get("debug") == "1"
+
+
+@contextmanager
+def debug_trace(page, sidebar=True):
+    """Trace the rerun run inside the block and show it when debugging.
+
+    Fragments can't draw into the sidebar, so fragment reruns pass
+    sidebar=False to show their waterfall inline. Nothing can be drawn once
+    st.stop has run, so code inside the block ends a rerun early with
+    ``stop``, which shows the panel first. st.rerun skips it, the next run
+    shows its own.
+    """
+    if not debug_enabled():
+        yield
+        return
+    with tracing.trace(page) as root:
+        token = _active.set((root, sidebar))
+        try:
+            yield
+        finally:
+            _active.reset(token)
+    _show(root, sidebar)
+
+
+def _show(root, sidebar):
+    ctx = get_script_run_ctx()
+    # A full run's trace can end inside a fragment, which can't use the sidebar either
+    if sidebar and not (ctx and ctx.current_fragment_id):
+        with st.sidebar:
+            waterfall(root)
+    else:
+        waterfall(root)
+
+
+def stop():
+    """st.stop() that shows the debug trace of the rerun so far first"""
+    active = _active.get()
+    if active is not None:
+        root, sidebar = active
+        root.attrs["stopped"] = True
+        _show(root, sidebar)
+    st.stop()
+
+
+def _hover(span):
+    lines = [f"<b>{span.name}</b>", f"{span.duration * 1000:.1f} ms"]
+    lines += [f"{key}: {value}" for key, value in span.attrs.items()]
+    return "<br>".join(lines)
+
+
+def waterfall(root):
+    """Render a span tree as a waterfall chart with a Chrome trace download"""
+    spans = list(root.walk())
+    api = [s for _, s in spans if s.category == "api"]
+    received = sum(s.attrs.get("bytes") or 0 for s in api)
+    with st.expander("🔍 Debug trace", expanded=True):
+        st.caption(
+            f"{root.duration * 1000:.0f} ms · {len(api)} API requests · {received / 1024:.1f} KiB received"
+        )
+        go = lazy.plotly_graph_objects()
+        # Numbered labels keep repeated span names on separate rows
+        labels = [f"{i:>2} {'· ' * depth}{s.name}" for i, (depth, s) in enumerate(spans)]
+        figure = go.Figure(go.Bar(
+            y=labels,
+            x=[s.duration * 1000 for _, s in spans],
+            base=[(s.start - root.start) * 1000 for _, s in spans],
+            orientation="h",
+            marker_color=[CATEGORY_COLORS.get(s.category, "#94a3b8") for _, s in spans],
+            hovertext=[_hover(s) for _, s in spans],
+            hoverinfo="text",
+        ))
+        figure.update_layout(
+            height=max(200, 22 * len(spans) + 60),
+            margin=dict(l=0, r=0, t=10, b=30),
+            yaxis=dict(autorange="reversed"),
+            xaxis_title="ms",
+            showlegend=False,
+        )
+        st.plotly_chart(figure, use_container_width=True)
+        st.download_button(
+            "Download Chrome trace",
+            tracing.chrome_trace(root),
+            file_name=f"eduflow-{root.name}-trace.json",
+            mime="application/json",
+        )
@@ -0,0 +1,23 @@
+"""Partial-response field masks, one per view"""
+
+# Course list card/grid: what course_card shows plus ordering and state
+COURSE_CARD = "id,name,section,room,description,courseState,updateTime"
+# Course Details tab, fetched lazily with courses().get
+COURSE_DETAIL = (
+    "id,name,section,room,description,descriptionHeading,courseState,"
+    "creationTime,updateTime,enrollmentCode,alternateLink"
+)
+# Roster table row, without photos or permissions
+ROSTER_ROW = "userId,profile(name/fullName,emailAddress)"
+# Announcement feed item
+ANNOUNCEMENT_ITEM = "id,text,state,updateTime"
+# Only need to know whether any course exists
+COURSE_EXISTS = "courses(id)"
+PROFILE = "id,email,name"
+# Matching bulk provisioning rows against existing courses
+COURSE_KEY = "id,name,section"
+
+
+def list_mask(items_key, item_fields):
+    """Mask for a list response: the page token plus projected items"""
+    return f"nextPageToken,{items_key}({item_fields})"
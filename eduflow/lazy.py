@@ -0,0 +1,139 @@
+"""Lazy access to heavy modules, plus an optional startup warmup.
+
+Modules listed in HEAVY_MODULES are only imported when something first
+needs them, so a page that doesn't use the Google stack never pays for it.
+``start_warmup`` imports them (and loads the discovery documents) on a
+background thread so the first real visitor finds them ready.
+"""
+
+import importlib
+import logging
+import os
+import sys
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+HEAVY_MODULES = [
+    "googleapiclient.discovery",
+    "google_auth_oauthlib.flow",
+    "google.auth.transport.requests",
+    "google.oauth2.credentials",
+    "google.auth.jwt",
+    "streamlit_lottie",
+    "streamlit_extras.stylable_container",
+    "pandas",
+    "pyarrow",
+    "pyarrow.compute",
+]
+
+_import_times = {}
+_warmup_thread = None
+_warmup_lock = threading.Lock()
+
+
+def module(name):
+    """Import a module on first use, recording how long the import took"""
+    cached = name in sys.modules
+    start = time.perf_counter()
+    loaded = importlib.import_module(name)
+    if not cached:
+        _import_times.setdefault(name, time.perf_counter() - start)
+    return loaded
+
+
+# ===== ACCESSORS =====
+def build_from_document(*args, **kwargs):
+    return module("googleapiclient.discovery").build_from_document(*args, **kwargs)
+
+
+def oauth_flow():
+    """google_auth_oauthlib Flow class"""
+    return module("google_auth_oauthlib.flow").Flow
+
+
+def auth_request(session=None):
+    """A google.auth transport Request for token refreshes, over session if given"""
+    return module("google.auth.transport.requests").Request(session)
+
+
+def user_credentials():
+    """google.oauth2 user Credentials class"""
+    return module("google.oauth2.credentials").Credentials
+
+
+def jwt():
+    return module("google.auth.jwt")
+
+
+def pandas():
+    return module("pandas")
+
+
+def pyarrow():
+    return module("pyarrow")
+
+
+def pyarrow_compute():
+    return module("pyarrow.compute")
+
+
+def plotly_graph_objects():
+    """plotly.graph_objects, only needed by the debug panel"""
+    return module("plotly.graph_objects")
+
+
+def st_lottie(*args, **kwargs):
+    return module("streamlit_lottie").st_lottie(*args, **kwargs)
+
+
+def stylable_container(*args, **kwargs):
+    return module("streamlit_extras.stylable_container").stylable_container(*args, **kwargs)
+
+
+# ===== WARMUP =====
+def warmup():
+    """Import every heavy module and load discovery documents, returning timings"""
+    start = time.perf_counter()
+    for name in HEAVY_MODULES:
+        try:
+            module(name)
+        except ImportError:
+            logger.warning("Warmup could not import %s", name)
+    from eduflow.services import warm_discovery
+    discovery_start = time.perf_counter()
+    warm_discovery()
+    _import_times["discovery documents"] = time.perf_counter() - discovery_start
+    _import_times["warmup total"] = time.perf_counter() - start
+    logger.info("EduFlow warmup finished:\n%s", format_report())
+    return startup_report()
+
+
+def start_warmup():
+    """Run warmup once per process on a background thread"""
+    global _warmup_thread
+    with _warmup_lock:
+        if _warmup_thread is None:
+            _warmup_thread = threading.Thread(target=warmup, name="eduflow-warmup", daemon=True)
+            _warmup_thread.start()
+    return _warmup_thread
+
+
+def warmup_enabled():
+    return os.environ.get("EDUFLOW_WARMUP", "").lower() in ("1", "true", "yes")
+
+
+def startup_report():
+    """Seconds spent on each lazy import (and warmup step) so far"""
+    return dict(_import_times)
+
+
+def format_report():
+    rows = sorted(_import_times.items(), key=lambda item: -item[1])
+    return "\n".join(f"{seconds * 1000:9.1f} ms  {name}" for name, seconds in rows)
+
+
+if __name__ == "__main__":
+    warmup()
+    print(format_report())
@@ -0,0 +1,158 @@
+"""Prometheus metrics for Google API calls, token handling and page renders.
+
+API calls are measured inside the request executor, one observation per
+attempt and excluding the time spent waiting for quota, which is recorded
+separately. Coalesced reads are counted by the scheduler's single-flight
+and exported through ``register_coalescing``. ``render`` wraps a page
+rerun and records how long it took and how many API calls it made.
+``start_server`` exposes everything on a local HTTP endpoint once per
+process.
+"""
+
+import contextlib
+import contextvars
+import logging
+import os
+import threading
+import time
+
+from googleapiclient.errors import HttpError
+from prometheus_client import REGISTRY, Counter, Histogram, Summary, start_http_server
+from prometheus_client.core import CounterMetricFamily
+
+logger = logging.getLogger(__name__)
+
+# 0 disables the endpoint
+METRICS_PORT = int(os.environ.get("EDUFLOW_METRICS_PORT", "9464"))
+METRICS_ADDR = os.environ.get("EDUFLOW_METRICS_ADDR", "127.0.0.1")
+
+LATENCY_BUCKETS = (0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+API_LATENCY = Histogram(
+    "eduflow_api_request_seconds", "Google API request latency per attempt",
+    ["endpoint"], buckets=LATENCY_BUCKETS,
+)
+API_ERRORS = Counter(
+    "eduflow_api_errors_total", "Failed Google API request attempts", ["endpoint", "status"],
+)
+API_RESPONSE_BYTES = Summary(
+    "eduflow_api_response_bytes", "Google API response body size", ["endpoint"],
+)
+QUOTA_WAIT = Histogram(
+    "eduflow_quota_wait_seconds", "Time spent waiting for rate limit tokens",
+    ["lane"], buckets=LATENCY_BUCKETS,
+)
+TOKEN_LATENCY = Histogram(
+    "eduflow_token_seconds", "OAuth token exchange and refresh latency",
+    ["operation"], buckets=LATENCY_BUCKETS,
+)
+TOKEN_ERRORS = Counter(
+    "eduflow_token_errors_total", "Failed OAuth token exchanges and refreshes", ["operation"],
+)
+RENDER_LATENCY = Histogram(
+    "eduflow_page_render_seconds", "Duration of one page rerun", ["page"], buckets=LATENCY_BUCKETS,
+)
+RERUN_API_CALLS = Histogram(
+    "eduflow_rerun_api_calls", "Google API calls made by one page rerun",
+    ["page"], buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100, 250),
+)
+
+# API call counter of the rerun running in this context, if any
+_rerun_calls = contextvars.ContextVar("eduflow_rerun_calls", default=None)
+_server_started = False
+_server_lock = threading.Lock()
+
+
+def endpoint(request):
+    """Endpoint label for a request, e.g. classroom.courses.list"""
+    return getattr(request, "methodId", None) or "batch"
+
+
+@contextlib.contextmanager
+def api_call(request):
+    """Measure one attempt at executing request, yielding {"bytes": size}"""
+    label = endpoint(request)
+    call = {"bytes": None}
+    postproc = getattr(request, "postproc", None)
+    if postproc is not None:
+        # Only the response handler sees the raw body
+        def measured(resp, content):
+            call["bytes"] = len(content or b"")
+            API_RESPONSE_BYTES.labels(label).observe(call["bytes"])
+            return postproc(resp, content)
+        request.postproc = measured
+    calls = _rerun_calls.get()
+    if calls is not None:
+        calls[0] += 1
+    start = time.perf_counter()
+    try:
+        yield call
+    except HttpError as e:
+        API_ERRORS.labels(label, str(e.resp.status)).inc()
+        raise
+    except Exception as e:
+        API_ERRORS.labels(label, type(e).__name__).inc()
+        raise
+    finally:
+        API_LATENCY.labels(label).observe(time.perf_counter() - start)
+        if postproc is not None:
+            request.postproc = postproc
+
+
+@contextlib.contextmanager
+def token_operation(operation):
+    """Measure an OAuth token exchange or refresh"""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        TOKEN_ERRORS.labels(operation).inc()
+        raise
+    finally:
+        TOKEN_LATENCY.labels(operation).observe(time.perf_counter() - start)
+
+
+@contextlib.contextmanager
+def render(page):
+    """Measure one rerun of a page script, including st.stop and st.rerun exits"""
+    start_server()
+    calls = [0]
+    token = _rerun_calls.set(calls)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        RENDER_LATENCY.labels(page).observe(time.perf_counter() - start)
+        RERUN_API_CALLS.labels(page).observe(calls[0])
+        _rerun_calls.reset(token)
+
+
+class _CoalescingCollector:
+    def __init__(self, stats):
+        self.stats = stats
+
+    def collect(self):
+        family = CounterMetricFamily(
+            "eduflow_api_reads", "GET requests sent vs served from a coalesced response", labels=["outcome"],
+        )
+        for outcome, count in self.stats().items():
+            family.add_metric([outcome], count)
+        yield family
+
+
+def register_coalescing(stats):
+    """Export stats() ({"executed": n, "coalesced": n}) as eduflow_api_reads_total"""
+    REGISTRY.register(_CoalescingCollector(stats))
+
+
+def start_server(port=METRICS_PORT, addr=METRICS_ADDR):
+    """Serve /metrics on port once per process"""
+    global _server_started
+    with _server_lock:
+        if _server_started or not port:
+            return
+        _server_started = True
+        try:
+            start_http_server(port, addr)
+        except OSError:
+            logger.warning("Metrics endpoint could not bind %s:%s", addr, port)
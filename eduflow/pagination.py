@@ -0,0 +1,109 @@
+"""Paged iteration over Classroom list endpoints"""
+
+import json
+import os
+import time
+
+from eduflow.cache import cache
+from eduflow.scheduler import execute, request_user
+
+DEFAULT_PAGE_SIZE = int(os.environ.get("EDUFLOW_PAGE_SIZE", "50"))
+
+
+def iter_pages(list_method, items_key, page_size=DEFAULT_PAGE_SIZE, page_token=None,
+               priority=None, **params):
+    """Yield (items, next_page_token) for each page of a list call"""
+    while True:
+        response = execute(list_method(pageSize=page_size, pageToken=page_token, **params), priority)
+        page_token = response.get("nextPageToken") or None
+        yield response.get(items_key, []), page_token
+        if page_token is None:
+            return
+
+
+def iter_items(list_method, items_key, page_size=DEFAULT_PAGE_SIZE, priority=None, **params):
+    """Yield every item of a list call, fetching pages as they are consumed"""
+    for items, _ in iter_pages(list_method, items_key, page_size, priority=priority, **params):
+        yield from items
+
+
+class PagedList:
+    """Items fetched so far from a list call, extended one page at a time.
+
+    With a cache_kind, pages are read from and written to the persistent
+    cache under (user, cache_kind, cache_scope). With stale_ok, expired
+    pages still within their stale limit are used too; ``stale`` and
+    ``fetched_at`` then tell how old the items are, and ``revalidate``
+    fetches fresh pages into the cache.
+    """
+
+    def __init__(self, list_method, items_key, page_size=DEFAULT_PAGE_SIZE,
+                 cache_kind=None, cache_scope="", stale_ok=False, **params):
+        self._list_method = list_method
+        self._items_key = items_key
+        self._params = params
+        self._cache_kind = cache_kind
+        self._cache_scope = cache_scope
+        self._next_token = None
+        self.page_size = page_size
+        self.stale_ok = stale_ok
+        self.items = []
+        self.pages_loaded = 0
+        self.exhausted = False
+        # When the oldest page held was fetched, and whether it has expired
+        self.fetched_at = None
+        self.stale = False
+
+    def load_more(self):
+        """Fetch the next page and return its items"""
+        if self.exhausted:
+            return []
+        items, self._next_token = self._fetch_page()
+        self.items.extend(items)
+        self.pages_loaded += 1
+        self.exhausted = self._next_token is None
+        return items
+
+    def _fetch_page(self):
+        if self._cache_kind is not None:
+            key = self._cache_key(self._next_token)
+            entry = cache.lookup(self._user(), self._cache_kind, self._cache_scope, key)
+            if entry is not None and (entry.fresh or self.stale_ok):
+                self._fetched(entry.stored_at, not entry.fresh)
+                return entry.value["items"], entry.value["next"]
+        self._fetched(time.time(), False)
+        return self._fetch_live(self._next_token)
+
+    def _fetched(self, at, stale):
+        self.fetched_at = at if self.fetched_at is None else min(self.fetched_at, at)
+        self.stale = self.stale or stale
+
+    def _user(self):
+        return request_user(self._list_method.__self__)
+
+    def _cache_key(self, page_token):
+        return json.dumps([self.page_size, page_token, self._params], sort_keys=True)
+
+    def _fetch_live(self, page_token):
+        items, next_token = next(iter_pages(
+            self._list_method, self._items_key, self.page_size, page_token, **self._params
+        ))
+        if self._cache_kind is not None:
+            cache.put(self._user(), self._cache_kind, self._cache_scope, self._cache_key(page_token),
+                      {"items": items, "next": next_token})
+        return items, next_token
+
+    def revalidate(self, pages=None):
+        """Fetch the first pages (all of them when None) into the cache, leaving this list as it is"""
+        token, fetched = None, 0
+        while pages is None or fetched < pages:
+            _, token = self._fetch_live(token)
+            fetched += 1
+            if token is None:
+                break
+
+    def ensure_loaded(self):
+        """Make sure at least the first page is available"""
+        if not self.pages_loaded:
+            self.load_more()
+        return self.items
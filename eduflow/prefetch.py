@@ -0,0 +1,90 @@
+"""Background warming of course details while the course list is shown.
+
+The course list hands its courses to ``Prefetcher``, which fetches what the
+detail view needs for the most recently updated ones into the persistent
+cache. Workers run on the PREFETCH lane of the quota scheduler, so they
+only use quota that interactive requests leave free, and opening a warmed
+course is served from cache.
+"""
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from cachetools import LRUCache
+
+from eduflow.scheduler import PREFETCH, lane
+
+logger = logging.getLogger(__name__)
+
+# Courses warmed per course list render, 0 turns prefetching off
+PREFETCH_DEPTH = int(os.environ.get("EDUFLOW_PREFETCH_DEPTH", "5"))
+PREFETCH_WORKERS = int(os.environ.get("EDUFLOW_PREFETCH_WORKERS", "2"))
+# Seconds before the same course is warmed again for the same user
+PREFETCH_INTERVAL = int(os.environ.get("EDUFLOW_PREFETCH_INTERVAL", "120"))
+# Most warm-ups queued at once across all users
+MAX_PENDING = 64
+
+
+def most_likely(courses, depth):
+    """The depth most recently updated courses, the ones likely opened next"""
+    ranked = sorted(courses, key=lambda c: c.get("updateTime") or "", reverse=True)
+    return ranked[:depth]
+
+
+class Prefetcher:
+    """Bounded worker pool that warms course details once per interval"""
+
+    def __init__(self, workers=PREFETCH_WORKERS, depth=PREFETCH_DEPTH,
+                 interval=PREFETCH_INTERVAL, max_pending=MAX_PENDING):
+        self.workers = workers
+        self.depth = depth
+        self.interval = interval
+        self.max_pending = max_pending
+        self._pool = None
+        self._pending = set()
+        self._recent = LRUCache(maxsize=4096)
+        self._lock = threading.Lock()
+
+    def _executor(self):
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix="eduflow-prefetch"
+            )
+        return self._pool
+
+    def prefetch(self, user, courses, warm):
+        """Queue warm(course_id) for the likeliest courses, returning their ids"""
+        if self.depth <= 0 or self.workers <= 0:
+            return []
+        queued = []
+        now = time.monotonic()
+        for course in most_likely(courses, self.depth):
+            key = (user, course["id"])
+            with self._lock:
+                if key in self._pending or len(self._pending) >= self.max_pending:
+                    continue
+                if now - self._recent.get(key, -self.interval) < self.interval:
+                    continue
+                self._pending.add(key)
+                pool = self._executor()
+            pool.submit(self._run, key, warm)
+            queued.append(course["id"])
+        return queued
+
+    def _run(self, key, warm):
+        try:
+            with lane(PREFETCH):
+                warm(key[1])
+        except Exception:
+            # A failed warm-up only means the detail view fetches as usual
+            logger.debug("Prefetch of course %s failed", key[1], exc_info=True)
+        finally:
+            with self._lock:
+                self._pending.discard(key)
+                self._recent[key] = time.monotonic()
+
+
+prefetcher = Prefetcher()
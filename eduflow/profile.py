@@ -0,0 +1,71 @@
+"""User profile lookup without a userinfo call per rerun.
+
+The profile is taken from the ID token returned at login when possible,
+otherwise fetched from the OAuth2 userinfo endpoint once, and cached per
+user both in memory and in the persistent cache.
+"""
+
+import threading
+
+from cachetools import LRUCache
+
+from eduflow import lazy
+from eduflow.cache import cache
+from eduflow.fields import PROFILE
+from eduflow.scheduler import execute
+from eduflow.services import oauth2_service
+
+PROFILE_TTL = 30 * 24 * 3600
+
+_profiles = LRUCache(maxsize=4096)
+_lock = threading.Lock()
+
+
+def profile_from_id_token(id_token):
+    """Profile from ID token claims, trusted as it came straight from Google's token endpoint"""
+    claims = lazy.jwt().decode(id_token, verify=False)
+    return {"id": claims["sub"], "email": claims.get("email"), "name": claims.get("name")}
+
+
+def _fetch_profile(creds, use_id_token=True):
+    id_token = getattr(creds, "id_token", None)
+    if id_token and use_id_token:
+        try:
+            profile = profile_from_id_token(id_token)
+            if profile["email"]:
+                return profile
+        except (ValueError, KeyError):
+            pass
+    info = execute(oauth2_service(creds).userinfo().get(fields=PROFILE))
+    return {"id": info["id"], "email": info.get("email"), "name": info.get("name")}
+
+
+def get_profile(creds, user_id=None, refresh=False):
+    """Profile (id, email, name) for creds, resolved once per user
+
+    Without user_id, as at sign-in, it is read from the ID token and then
+    cached under the id the token names.
+    """
+    if user_id and not refresh:
+        with _lock:
+            profile = _profiles.get(user_id)
+        if profile is None:
+            profile = cache.get(user_id, "profile")
+        if profile is not None:
+            with _lock:
+                _profiles[user_id] = profile
+            return profile
+    # An explicit refresh asks Google rather than re-reading the login ID token
+    profile = _fetch_profile(creds, use_id_token=not refresh)
+    user_id = user_id or profile["id"]
+    cache.put(user_id, "profile", "", "", profile, ttl=PROFILE_TTL)
+    with _lock:
+        _profiles[user_id] = profile
+    return profile
+
+
+def forget_profile(user_id):
+    """Drop the cached profile, e.g. on sign out"""
+    with _lock:
+        _profiles.pop(user_id, None)
+    cache.invalidate(user_id, "profile")
@@ -0,0 +1,284 @@
+"""Bulk course provisioning from CSV.
+
+``read_csv`` validates a whole file in one pass. ``provision`` then skips
+rows whose name and section match a course the teacher already has,
+creates the rest in batch requests on the BULK lane, several batches at a
+time, invites each course's co-teachers, and yields every row's result as
+soon as its batch is done. A create that failed without a clear answer
+(a 5xx or a dropped connection) may still have gone through, so before
+such rows are sent again the teacher's courses are listed, and rows found
+there count as created. From the command line:
+
+    python -m eduflow.provisioning courses.csv --user teacher@school.edu [--dry-run]
+"""
+
+import argparse
+import csv
+import io
+import os
+import random
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from eduflow.cache import cache
+from eduflow.credentials import store as credential_store
+from eduflow.fields import COURSE_KEY, list_mask
+from eduflow.invitations import ALREADY_ENROLLED, BATCH_LIMIT, MAX_ATTEMPTS, SENT, invite
+from eduflow.pagination import iter_items
+from eduflow.refresher import refresher
+from eduflow.scheduler import BULK, describe_error, execute, is_retryable, request_user
+from eduflow.services import classroom_service
+
+COLUMNS = ["title", "section", "room", "description", "co-teachers"]
+RESULT_COLUMNS = ["line", "title", "section", "status", "id", "co_teachers"]
+# Classroom's length limits for the fields a row fills in
+MAX_LENGTHS = {"title": 750, "section": 2800, "room": 650, "description": 30000}
+# Batch requests in flight at once; the quota scheduler still paces them
+PROVISION_WORKERS = int(os.environ.get("EDUFLOW_PROVISION_WORKERS", "4"))
+
+CREATED = "✅ Created"
+EXISTS = "⏭️ Already exists"
+WOULD_CREATE = "🆕 Would be created"
+
+EMAIL = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+
+
+def course_body(title, section, description, room):
+    """Request body for a new course owned by the caller"""
+    return {
+        "name": title,
+        "section": section,
+        "descriptionHeading": "Welcome to " + title,
+        "description": description,
+        "room": room,
+        "ownerId": "me",
+        "courseState": "PROVISIONED"
+    }
+
+
+def course_key(name, section):
+    """What makes two courses the same for provisioning: name and section, ignoring case and spacing"""
+    return (" ".join((name or "").split()).casefold(), " ".join((section or "").split()).casefold())
+
+
+def read_csv(text):
+    """Parse and validate a course CSV, returning (rows, problems) with problems as (line, message)
+
+    text may also be the file's bytes, which must be UTF-8.
+    """
+    if isinstance(text, bytes):
+        try:
+            text = text.decode("utf-8-sig")
+        except UnicodeDecodeError as e:
+            line = text[:e.start].count(b"\n") + 1
+            return [], [(line, "The file is not UTF-8 text, save it as CSV UTF-8")]
+    reader = csv.DictReader(io.StringIO(text))
+    header = {name: (name or "").strip().lower().replace("_", "-").replace(" ", "-")
+              for name in reader.fieldnames or []}
+    problems = [(1, f"Unknown column '{name}'") for name, column in header.items() if column not in COLUMNS]
+    if "title" not in header.values():
+        problems.append((1, "Missing column 'title'"))
+        return [], problems
+
+    rows, seen = [], {}
+    for record in reader:
+        line = reader.line_num
+        row = {column: (record.get(name) or "").strip() for name, column in header.items() if column in COLUMNS}
+        if not any(row.values()):
+            continue
+        row = {
+            "line": line,
+            "title": row.get("title", ""),
+            "section": row.get("section", ""),
+            "room": row.get("room", ""),
+            "description": row.get("description", ""),
+            "co_teachers": [e for e in re.split(r"[;,\s]+", row.get("co-teachers", "")) if e],
+        }
+        if not row["title"]:
+            problems.append((line, "Title is required"))
+        for column, limit in MAX_LENGTHS.items():
+            if len(row[column]) > limit:
+                problems.append((line, f"{column.capitalize()} is longer than {limit} characters"))
+        problems.extend((line, f"Invalid co-teacher email '{e}'") for e in row["co_teachers"] if not EMAIL.match(e))
+        key = course_key(row["title"], row["section"])
+        if key in seen:
+            problems.append((line, f"Same title and section as line {seen[key]}"))
+        seen.setdefault(key, line)
+        rows.append(row)
+    return rows, problems
+
+
+def existing_courses(service):
+    """The caller's courses by course_key"""
+    courses = iter_items(
+        service.courses().list, "courses", priority=BULK,
+        teacherId="me", fields=list_mask("courses", COURSE_KEY)
+    )
+    return {course_key(c.get("name"), c.get("section")): c for c in courses}
+
+
+def _result(row, status, course_id=None, co_teachers=""):
+    return {"line": row["line"], "title": row["title"], "section": row["section"],
+            "status": status, "id": course_id, "co_teachers": co_teachers}
+
+
+def _co_teacher_summary(statuses):
+    failed = [f"{email}: {status}" for (_, email), status in statuses if status not in (SENT, ALREADY_ENROLLED)]
+    invited = len(statuses) - len(failed)
+    return "; ".join(([f"{invited} invited"] if invited else []) + failed)
+
+
+def _created(service, created):
+    """Invite the co-teachers of (row, course) pairs in one go, returning the rows' results"""
+    # Statuses come back in order
+    pairs = [(course["id"], email) for row, course in created for email in row["co_teachers"]]
+    statuses = iter(invite(service, pairs, role="TEACHER"))
+    results = []
+    for row, course in created:
+        invited = [next(statuses) for _ in row["co_teachers"]]
+        results.append(_result(row, CREATED, course["id"], _co_teacher_summary(invited)))
+    return results
+
+
+def _create_batch(service, rows):
+    """Create one batch of courses, returning (results, rows to retry, created courses)"""
+    created, errors, retry = {}, {}, {}
+
+    def callback(request_id, response, exception):
+        i = int(request_id)
+        if is_retryable(exception):
+            retry[i] = exception
+        elif exception is not None:
+            errors[i] = exception
+        else:
+            created[i] = response
+
+    batch = service.new_batch_http_request(callback=callback)
+    for i, row in enumerate(rows):
+        body = course_body(row["title"], row["section"], row["description"], row["room"])
+        batch.add(service.courses().create(body=body), request_id=str(i))
+    try:
+        # Only resent by the executor on rate limit responses, which are never applied
+        execute(batch, BULK, cost=len(rows), user=request_user(service))
+    except Exception as e:
+        if not is_retryable(e):
+            raise
+        retry.update((i, e) for i in range(len(rows)) if i not in created and i not in errors)
+
+    results = _created(service, [(rows[i], course) for i, course in created.items()])
+    results += [_result(rows[i], f"❌ Error: {describe_error(e)}") for i, e in errors.items()]
+    return results, [(rows[i], e) for i, e in retry.items()], list(created.values())
+
+
+def provision(service, rows, workers=PROVISION_WORKERS, dry_run=False):
+    """Create the courses in rows that don't exist yet, yielding each row's result as it is known"""
+    existing = existing_courses(service)
+    created = []
+    found = False
+    pending = []
+    for row in rows:
+        course = existing.get(course_key(row["title"], row["section"]))
+        if course is not None:
+            yield _result(row, EXISTS, course["id"])
+        elif dry_run:
+            yield _result(row, WOULD_CREATE)
+        else:
+            pending.append(row)
+
+    try:
+        for attempt in range(MAX_ATTEMPTS):
+            if not pending:
+                return
+            retry = []
+            with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="eduflow-provision") as pool:
+                futures = {
+                    pool.submit(_create_batch, service, pending[start:start + BATCH_LIMIT]):
+                        pending[start:start + BATCH_LIMIT]
+                    for start in range(0, len(pending), BATCH_LIMIT)
+                }
+                for future in as_completed(futures):
+                    try:
+                        results, failed, courses = future.result()
+                    except Exception as e:
+                        results, failed, courses = [_result(row, f"❌ Error: {describe_error(e)}")
+                                                    for row in futures[future]], [], []
+                    created.extend(courses)
+                    retry.extend(failed)
+                    yield from results
+            if not retry:
+                return
+            time.sleep(min(2 ** attempt, 8) + random.random())
+            # A create that failed ambiguously may still have gone through, look before retrying
+            existing = existing_courses(service)
+            pending, recovered = [], []
+            for row, e in retry:
+                course = existing.get(course_key(row["title"], row["section"]))
+                if course is not None:
+                    recovered.append((row, course))
+                elif attempt == MAX_ATTEMPTS - 1:
+                    yield _result(row, f"❌ Error: {describe_error(e)}")
+                else:
+                    pending.append(row)
+            if recovered:
+                found = True
+                yield from _created(service, recovered)
+    finally:
+        user = request_user(service)
+        for course in created:
+            cache.put(user, "course", course["id"], "", course)
+        if created or found:
+            cache.invalidate(user, "courses")
+
+
+def results_csv(results):
+    """Per-row results as CSV text"""
+    out = io.StringIO()
+    writer = csv.DictWriter(out, RESULT_COLUMNS)
+    writer.writeheader()
+    writer.writerows(results)
+    return out.getvalue()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Create Google Classroom courses from a CSV file")
+    parser.add_argument("csv", help="CSV with the columns " + ", ".join(COLUMNS))
+    parser.add_argument("--user", required=True, help="email (or Google user id) of a teacher signed in to EduFlow")
+    parser.add_argument("--dry-run", action="store_true", help="validate and report what would be created")
+    parser.add_argument("--workers", type=int, default=PROVISION_WORKERS, help="batch requests in flight")
+    parser.add_argument("--output", help="write per-row results to this CSV file instead of stdout")
+    args = parser.parse_args(argv)
+
+    with open(args.csv, "rb") as f:
+        rows, problems = read_csv(f.read())
+    for line, message in problems:
+        print(f"line {line}: {message}", file=sys.stderr)
+    if problems:
+        return 2
+
+    user_id = credential_store.resolve(args.user)
+    creds = refresher.refresh(user_id) if user_id else None
+    if creds is None:
+        print(f"No credentials stored for {args.user}, sign in to the dashboard first", file=sys.stderr)
+        return 1
+
+    out = open(args.output, "w", newline="") if args.output else sys.stdout
+    failed = 0
+    try:
+        writer = csv.DictWriter(out, RESULT_COLUMNS)
+        writer.writeheader()
+        results = provision(classroom_service(creds, user_id), rows, args.workers, args.dry_run)
+        for done, result in enumerate(results, 1):
+            writer.writerow(result)
+            out.flush()
+            print(f"[{done}/{len(rows)}] line {result['line']}: {result['status']}", file=sys.stderr)
+            failed += result["status"].startswith("❌")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+"""Background renewal of OAuth access tokens.
+
+A daemon thread renews access tokens of active users, those who loaded a
+page within ``IDLE_TIMEOUT``, shortly before they expire, so page renders
+find valid credentials in the store and never sit through an OAuth round
+trip. A per-user lock keeps concurrent reruns from refreshing the same
+token twice.
+"""
+
+import logging
+import os
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+from google.auth.exceptions import RefreshError
+
+from eduflow import lazy, metrics, transport
+from eduflow.credentials import store as credential_store
+from eduflow.tracing import span
+
+logger = logging.getLogger(__name__)
+
+# Renew tokens this long before they expire
+REFRESH_MARGIN = timedelta(seconds=int(os.environ.get("EDUFLOW_REFRESH_MARGIN", "600")))
+CHECK_INTERVAL = int(os.environ.get("EDUFLOW_REFRESH_INTERVAL", "60"))
+# Stop renewing a user's token after this many seconds without a page load;
+# when they come back, the first request refreshes it on demand
+IDLE_TIMEOUT = int(os.environ.get("EDUFLOW_REFRESH_IDLE_TIMEOUT", "3600"))
+
+
+def _utcnow():
+    # google-auth keeps expiry as a naive UTC datetime
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def needs_refresh(creds, margin=REFRESH_MARGIN):
+    """True if creds can be refreshed and expire within margin"""
+    if creds is None or not creds.refresh_token:
+        return False
+    return creds.expiry is None or creds.expiry - _utcnow() < margin
+
+
+class TokenRefresher:
+    """Keeps access tokens of the active users in the credential store fresh"""
+
+    def __init__(self, store, margin=REFRESH_MARGIN, interval=CHECK_INTERVAL, idle_timeout=IDLE_TIMEOUT):
+        self.store = store
+        self.margin = margin
+        self.interval = interval
+        self.idle_timeout = idle_timeout
+        self._locks = defaultdict(threading.Lock)
+        self._locks_lock = threading.Lock()
+        self._thread = None
+        self._wake = threading.Event()
+
+    def _lock(self, user_id):
+        with self._locks_lock:
+            return self._locks[user_id]
+
+    def start(self):
+        """Start the background thread once per process"""
+        with self._locks_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="eduflow-token-refresher", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            for user_id in self.store.active_users(self.idle_timeout):
+                try:
+                    self.refresh(user_id)
+                except Exception:
+                    logger.exception("Background token refresh failed")
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def refresh(self, user_id, force=False):
+        """Refresh user_id's token if it is due, returning the current credentials"""
+        with self._lock(user_id):
+            creds = self.store.get(user_id)
+            if creds is None or not (force or needs_refresh(creds, self.margin)):
+                return creds
+            try:
+                with metrics.token_operation("refresh"), span("token refresh", "auth"):
+                    creds.refresh(lazy.auth_request(transport.session()))
+            except RefreshError:
+                # Revoked or expired refresh token, the user has to sign in again
+                self.store.delete(user_id)
+                return None
+            self.store.put(user_id, creds)
+            return creds
+
+    def nudge(self):
+        """Ask the background thread to check tokens now"""
+        self._wake.set()
+
+
+refresher = TokenRefresher(credential_store)
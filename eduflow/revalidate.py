@@ -0,0 +1,74 @@
+"""Background refreshes for stale-while-revalidate rendering.
+
+With ``STALE_WHILE_REVALIDATE`` on, the dashboard shows cached courses,
+announcements and rosters at once even after they expire, as long as they
+are within their stale limit (see ``eduflow.cache.STALE_LIMITS``), and
+hands a refresh to ``Revalidator``. Refreshes run on the BULK lane of the
+quota scheduler and write to the persistent cache; the page swaps in the
+fresh data once they are done.
+"""
+
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from eduflow.scheduler import BULK, lane
+
+logger = logging.getLogger(__name__)
+
+STALE_WHILE_REVALIDATE = os.environ.get("EDUFLOW_STALE_WHILE_REVALIDATE", "1").lower() in ("1", "true", "yes")
+REVALIDATE_WORKERS = int(os.environ.get("EDUFLOW_REVALIDATE_WORKERS", "2"))
+# Seconds between checks for a finished refresh
+POLL_INTERVAL = float(os.environ.get("EDUFLOW_REVALIDATE_POLL", "2"))
+
+
+def describe_age(seconds):
+    """How long ago something was fetched, e.g. '5 min ago'"""
+    if seconds < 60:
+        return "just now"
+    if seconds < 3600:
+        return f"{int(seconds // 60)} min ago"
+    if seconds < 2 * 86400:
+        return f"{int(seconds // 3600)} h ago"
+    return f"{int(seconds // 86400)} days ago"
+
+
+class Revalidator:
+    """Worker pool that runs at most one refresh per key at a time"""
+
+    def __init__(self, workers=REVALIDATE_WORKERS):
+        self.workers = workers
+        self._pool = None
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def _executor(self):
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix="eduflow-revalidate"
+            )
+        return self._pool
+
+    def submit(self, key, refresh):
+        """Queue refresh() unless one for key is already running, returning its Future"""
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is None:
+                job = self._jobs[key] = self._executor().submit(self._run, key, refresh)
+        return job
+
+    def _run(self, key, refresh):
+        try:
+            with lane(BULK):
+                refresh()
+        except Exception:
+            # The cached data stays on screen, the next visit tries again
+            logger.debug("Refresh of %s failed", key, exc_info=True)
+            raise
+        finally:
+            with self._lock:
+                self._jobs.pop(key, None)
+
+
+revalidator = Revalidator()
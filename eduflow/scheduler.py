@@ -0,0 +1,229 @@
+"""Quota-aware execution of Google API requests.
+
+Every Classroom/OAuth2 request is executed through ``execute`` so it draws
+from a per-user and a per-project token bucket, waits its turn by priority
+lane and is retried with jittered exponential backoff. Reads are retried on
+429/5xx responses and transport errors; writes only on rate limit responses,
+which guarantee nothing was applied. Identical GET requests from the same
+user are coalesced into one call.
+"""
+
+import contextlib
+import contextvars
+import heapq
+import itertools
+import os
+import socket
+import threading
+import time
+import urllib.parse
+
+from cachetools import LRUCache
+from googleapiclient.errors import HttpError
+from tenacity import Retrying, retry_if_exception, stop_after_attempt, wait_random_exponential
+
+from eduflow import metrics, tracing
+from eduflow.coalesce import SingleFlight
+from eduflow.services import user_key
+
+# Priority lanes, lower runs first
+INTERACTIVE = 0
+BULK = 1
+PREFETCH = 2
+LANE_NAMES = {INTERACTIVE: "interactive", BULK: "bulk", PREFETCH: "prefetch"}
+
+# Lane for requests that don't name one, see ``lane``
+_current_lane = contextvars.ContextVar("eduflow_lane", default=INTERACTIVE)
+
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+RATE_LIMIT_REASONS = ("rateLimitExceeded", "userRateLimitExceeded", "quotaExceeded")
+
+
+class TokenBucket:
+    """Token bucket whose waiters are served in priority order"""
+
+    def __init__(self, rate, capacity):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._cond = threading.Condition()
+        self._waiters = []
+        self._seq = itertools.count()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens=1, priority=INTERACTIVE):
+        """Block until tokens are available and no higher priority caller is waiting
+
+        A cost larger than the capacity waits for a full bucket and leaves it
+        in debt, so later callers wait until the whole cost is paid off.
+        """
+        tokens = float(tokens)
+        needed = min(tokens, self.capacity)
+        with self._cond:
+            ticket = (priority, next(self._seq))
+            heapq.heappush(self._waiters, ticket)
+            try:
+                while True:
+                    self._refill()
+                    if self._waiters[0] == ticket:
+                        if self._tokens >= needed:
+                            self._tokens -= tokens
+                            return
+                        self._cond.wait((needed - self._tokens) / self.rate)
+                    else:
+                        self._cond.wait(1.0)
+            finally:
+                self._waiters.remove(ticket)
+                heapq.heapify(self._waiters)
+                self._cond.notify_all()
+
+
+def is_rate_limited(exception):
+    """True for quota responses (429, or 403 with a rate limit reason), which are rejected before being applied"""
+    if not isinstance(exception, HttpError):
+        return False
+    if exception.resp.status == 429:
+        return True
+    return exception.resp.status == 403 and any(
+        reason in str(exception.content) for reason in RATE_LIMIT_REASONS
+    )
+
+
+def is_retryable(exception):
+    """True for quota and transient server/transport errors"""
+    if isinstance(exception, HttpError):
+        return exception.resp.status in RETRYABLE_STATUSES or is_rate_limited(exception)
+    return isinstance(exception, (socket.timeout, ConnectionError))
+
+
+def describe_error(exception):
+    """User-facing message for an API error"""
+    if is_retryable(exception):
+        return "Google Classroom is busy right now, please try again in a moment"
+    return str(exception)
+
+
+@contextlib.contextmanager
+def lane(priority):
+    """Run requests made inside the block on the given priority lane"""
+    token = _current_lane.set(priority)
+    try:
+        yield
+    finally:
+        _current_lane.reset(token)
+
+
+def request_user(request):
+    """Google user id a request (or service) is sent for"""
+    http = getattr(request, "http", None) or getattr(request, "_http", None)
+    # Handles built before the id is known, e.g. during sign-in, go by the credentials
+    return getattr(http, "user_id", None) or user_key(getattr(http, "credentials", None))
+
+
+def _span_attrs(request):
+    uri = getattr(request, "uri", None)
+    if uri is None:
+        # Batch request
+        return {"requests": len(getattr(request, "_order", ()))}
+    url = urllib.parse.urlsplit(uri)
+    params = {k: v for k, v in urllib.parse.parse_qsl(url.query) if k != "alt"}
+    return {"method": request.method, "path": url.path, **params}
+
+
+class RequestExecutor:
+    """Rate limited, retrying executor shared by every session on the server"""
+
+    def __init__(self, user_rate=10, user_burst=20, project_rate=40, project_burst=80,
+                 max_attempts=5, max_backoff=32, coalesce_window=2.0):
+        self.user_rate = user_rate
+        self.user_burst = user_burst
+        self.max_attempts = max_attempts
+        self.max_backoff = max_backoff
+        self._project = TokenBucket(project_rate, project_burst)
+        self._users = LRUCache(maxsize=4096)
+        self._users_lock = threading.Lock()
+        self.single_flight = SingleFlight(coalesce_window)
+
+    @classmethod
+    def from_env(cls):
+        """Executor configured from EDUFLOW_* environment variables"""
+        env = os.environ.get
+        return cls(
+            user_rate=float(env("EDUFLOW_USER_QPS", "10")),
+            user_burst=float(env("EDUFLOW_USER_BURST", "20")),
+            project_rate=float(env("EDUFLOW_PROJECT_QPS", "40")),
+            project_burst=float(env("EDUFLOW_PROJECT_BURST", "80")),
+            max_attempts=int(env("EDUFLOW_MAX_ATTEMPTS", "5")),
+            coalesce_window=float(env("EDUFLOW_COALESCE_WINDOW", "2")),
+        )
+
+    def _user_bucket(self, user):
+        with self._users_lock:
+            bucket = self._users.get(user)
+            if bucket is None:
+                bucket = self._users[user] = TokenBucket(self.user_rate, self.user_burst)
+            return bucket
+
+    def acquire(self, user, cost=1, priority=INTERACTIVE):
+        """Take cost tokens from the user's and the project's buckets"""
+        start = time.perf_counter()
+        self._user_bucket(user).acquire(cost, priority)
+        self._project.acquire(cost, priority)
+        metrics.QUOTA_WAIT.labels(LANE_NAMES.get(priority, str(priority))).observe(time.perf_counter() - start)
+
+    def execute(self, request, priority=None, cost=1, user=None, idempotent=None):
+        """Execute a request (or batch) within quota, retrying transient failures
+
+        Only idempotent requests, by default GETs, are retried on 5xx and
+        transport errors; a write that failed that way may still have been
+        applied, so it is retried on rate limit responses only.
+        """
+        if priority is None:
+            priority = _current_lane.get()
+        if user is None:
+            user = request_user(request)
+        if idempotent is None:
+            idempotent = getattr(request, "method", None) == "GET"
+        retry = is_retryable if idempotent else is_rate_limited
+        with tracing.span(metrics.endpoint(request), "api", **_span_attrs(request)) as traced:
+            if getattr(request, "method", None) == "GET":
+                key = (user, request.methodId, request.uri)
+                response = self.single_flight.do(key, lambda: self._execute(request, priority, cost, user, retry))
+                if traced is not None and "attempts" not in traced.attrs:
+                    # Served from another caller's response
+                    traced.attrs["coalesced"] = True
+                return response
+            try:
+                return self._execute(request, priority, cost, user, retry)
+            finally:
+                # Reads shared before this write may now be stale
+                self.single_flight.forget((user,))
+
+    def _execute(self, request, priority, cost, user, retry):
+        retrying = Retrying(
+            retry=retry_if_exception(retry),
+            wait=wait_random_exponential(multiplier=0.5, max=self.max_backoff),
+            stop=stop_after_attempt(self.max_attempts),
+            reraise=True,
+        )
+        for attempt in retrying:
+            with attempt:
+                self.acquire(user, cost, priority)
+                with metrics.api_call(request) as call:
+                    response = request.execute()
+                tracing.annotate(bytes=call["bytes"], attempts=attempt.retry_state.attempt_number)
+                return response
+
+
+executor = RequestExecutor.from_env()
+metrics.register_coalescing(executor.single_flight.stats)
+
+
+def execute(request, priority=None, cost=1, user=None, idempotent=None):
+    """Execute a request through the shared executor"""
+    return executor.execute(request, priority, cost, user, idempotent)
@@ -0,0 +1,90 @@
+"""Process-wide factory for Google API service objects.
+
+Streamlit re-executes the page scripts on every interaction, but imported
+modules stay loaded, so anything kept here survives reruns and is shared by
+every session on the server.
+"""
+
+import hashlib
+import json
+import threading
+
+from cachetools import LRUCache
+from googleapiclient.discovery_cache import get_static_doc
+
+from eduflow import lazy
+from eduflow.tracing import span
+from eduflow.transport import PooledHttp
+
+# Max number of per-credential service handles kept alive at once
+MAX_HANDLES = 256
+
+_docs = {}
+_docs_lock = threading.Lock()
+
+_handles = LRUCache(maxsize=MAX_HANDLES)
+_handles_lock = threading.Lock()
+
+
+def get_discovery_doc(api, version):
+    """Return the parsed discovery document, loaded once per process"""
+    key = (api, version)
+    doc = _docs.get(key)
+    if doc is None:
+        with _docs_lock:
+            doc = _docs.get(key)
+            if doc is None:
+                # Static copy shipped with google-api-python-client, no network
+                content = get_static_doc(api, version)
+                if content is None:
+                    raise ValueError(f"No bundled discovery document for {api} {version}")
+                doc = json.loads(content)
+                _docs[key] = doc
+    return doc
+
+
+def user_key(creds):
+    """Non-secret identifier for a set of credentials, new with every sign-in"""
+    secret = getattr(creds, "refresh_token", None) or getattr(creds, "token", None) or ""
+    return hashlib.sha256(secret.encode("utf-8")).hexdigest()[:32]
+
+
+def get_service(api, version, creds, user_id=None):
+    """Return a pooled service handle for the given credentials.
+
+    Handles send their requests through the shared connection pool, so one
+    handle can be used from any session or background thread. user_id is
+    the Google id of the signed-in account; requests sent with the handle
+    are cached and rate limited under it.
+    """
+    key = (api, version, user_key(creds))
+    with _handles_lock:
+        service = _handles.get(key)
+        if service is not None:
+            # Keep the handle pointed at the freshest credential object
+            service._http.credentials = creds
+            if user_id is not None:
+                service._http.user_id = user_id
+            return service
+    with span("service build", "service", api=f"{api} {version}"):
+        service = lazy.build_from_document(
+            get_discovery_doc(api, version), http=PooledHttp(creds, user_id)
+        )
+    with _handles_lock:
+        return _handles.setdefault(key, service)
+
+
+def classroom_service(creds, user_id=None):
+    """Classroom v1 service for the given credentials"""
+    return get_service("classroom", "v1", creds, user_id)
+
+
+def oauth2_service(creds, user_id=None):
+    """OAuth2 v2 service for the given credentials"""
+    return get_service("oauth2", "v2", creds, user_id)
+
+
+def warm_discovery():
+    """Load every discovery document the pages use"""
+    for api, version in (("classroom", "v1"), ("oauth2", "v2")):
+        get_discovery_doc(api, version)
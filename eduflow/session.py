@@ -0,0 +1,23 @@
+"""Signed-in user of the current Streamlit session, shared by the pages"""
+
+import streamlit as st
+
+from eduflow.credentials import store as credential_store
+from eduflow.profile import get_profile
+from eduflow.tracing import span
+
+
+def get_credentials():
+    """Credentials of the user signed in to this session"""
+    user_id = st.session_state.get("user_id")
+    # Keeps the background refresher renewing this user's token
+    credential_store.touch(user_id)
+    with span("credential load", "auth"):
+        return credential_store.get(user_id)
+
+
+def get_user_profile(creds):
+    """Profile of the signed-in user, resolved once per session"""
+    if "user_profile" not in st.session_state:
+        st.session_state.user_profile = get_profile(creds, st.session_state.get("user_id"))
+    return st.session_state.user_profile
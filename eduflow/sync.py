@@ -0,0 +1,203 @@
+"""Incremental announcement sync using updateTime cursors"""
+
+import os
+import time
+from datetime import datetime
+
+from eduflow import lazy
+from eduflow.cache import cache
+from eduflow.fields import ANNOUNCEMENT_ITEM, list_mask
+from eduflow.pagination import DEFAULT_PAGE_SIZE, iter_pages
+from eduflow.scheduler import request_user
+
+# Page size for refreshes once a course has been synced; usually one page
+DELTA_PAGE_SIZE = 10
+# Refetch the whole feed this often to drop deleted announcements
+FULL_SYNC_INTERVAL = 24 * 3600
+# A feed synced this recently (e.g. by the prefetcher) is shown without syncing
+FRESH_FOR = int(os.environ.get("EDUFLOW_FEED_FRESH_FOR", "60"))
+DISPLAY_FORMAT = "%B %d, %Y at %H:%M"
+
+
+def parse_time(value):
+    """Parse a Classroom RFC 3339 timestamp"""
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+class AnnouncementFeed:
+    """Locally held announcement feed for one course, newest first.
+
+    ``sync`` pages from the newest announcement down to the high-water mark
+    of the previous sync and merges the delta; ``load_more`` backfills older
+    history one page at a time. The feed state is kept in the persistent
+    cache so it outlives sessions and restarts: the synced head in one
+    entry, rewritten by each sync, and every backfilled page in an entry of
+    its own, so a long backfill never rewrites what it already stored. With
+    stale_ok, a feed synced within its stale limit is shown without syncing
+    and marked ``stale``.
+    """
+
+    def __init__(self, service, course_id, page_size=DEFAULT_PAGE_SIZE, stale_ok=False):
+        self._service = service
+        self._user = request_user(service)
+        self.course_id = course_id
+        self.page_size = page_size
+        self.stale_ok = stale_ok
+        state = cache.get(self._user, "announcement_feed", course_id) or {}
+        if time.time() - state.get("full_sync", 0) > FULL_SYNC_INTERVAL:
+            state = {}
+        self._head = state.get("items", [])
+        self._older = []
+        self._older_pages = 0
+        self.cursor = state.get("cursor")
+        self._older_token = state.get("older_token")
+        while state:
+            page = cache.get(self._user, "announcement_feed", course_id, self._page_key(self._older_pages))
+            if page is None:
+                break
+            self._older.extend(page["items"])
+            self._older_token = page["next"]
+            self._older_pages += 1
+        self._merge()
+        self._full_sync = state.get("full_sync", time.time())
+        self._synced_at = state.get("synced_at", 0)
+        self._frame = None
+        self.synced = False
+        self.stale = False
+
+    @property
+    def fetched_at(self):
+        return self._synced_at
+
+    @property
+    def exhausted(self):
+        return self.cursor is not None and self._older_token is None
+
+    def _pages(self, page_size, page_token=None):
+        return iter_pages(
+            self._service.courses().announcements().list,
+            "announcements",
+            page_size,
+            page_token,
+            courseId=self.course_id,
+            orderBy="updateTime desc",
+            fields=list_mask("announcements", ANNOUNCEMENT_ITEM)
+        )
+
+    @staticmethod
+    def _page_key(n):
+        return f"older:{n}"
+
+    def _merge(self):
+        # An announcement updated since it was backfilled is in the head too
+        head = {a["id"] for a in self._head}
+        self.items = self._head + [a for a in self._older if a["id"] not in head]
+        self._frame = None
+
+    def _save(self):
+        """Store the head; backfilled pages are stored by load_more as they arrive"""
+        self._frame = None
+        cache.put(self._user, "announcement_feed", self.course_id, "", {
+            "items": self._head,
+            "cursor": self.cursor,
+            "older_token": self._older_token,
+            "full_sync": self._full_sync,
+            "synced_at": self._synced_at,
+        })
+
+    def sync(self):
+        """Fetch announcements updated since the last sync and merge them in"""
+        if not self.cursor:
+            items, self._older_token = next(self._pages(self.page_size))
+            # The page may be shared with coalesced callers, ours is merged into
+            self._head = list(items)
+            self._older, self._older_pages = [], 0
+            # Backfilled pages of the previous sync no longer follow on from this one
+            cache.invalidate(self._user, "announcement_feed", self.course_id)
+        else:
+            high_water = parse_time(self.cursor)
+            known = {a["id"] for a in self.items}
+            delta = []
+            for items, _ in self._pages(DELTA_PAGE_SIZE):
+                fresh = [
+                    a for a in items
+                    if parse_time(a["updateTime"]) > high_water
+                    or (parse_time(a["updateTime"]) == high_water and a["id"] not in known)
+                ]
+                delta.extend(fresh)
+                if len(fresh) < len(items):
+                    break
+            if delta:
+                changed = {a["id"] for a in delta}
+                self._head = delta + [a for a in self._head if a["id"] not in changed]
+        self._merge()
+        if self.items:
+            self.cursor = max((a["updateTime"] for a in self.items), key=parse_time)
+        else:
+            self.cursor = ""
+        self.synced = True
+        self.stale = False
+        self._synced_at = time.time()
+        self._save()
+        return self.items
+
+    def load_more(self):
+        """Backfill the next page of older announcements"""
+        if self._older_token is None:
+            return []
+        items, self._older_token = next(self._pages(self.page_size, self._older_token))
+        known = {a["id"] for a in self.items}
+        items = [a for a in items if a["id"] not in known]
+        cache.put(self._user, "announcement_feed", self.course_id, self._page_key(self._older_pages),
+                  {"items": items, "next": self._older_token})
+        self._older_pages += 1
+        self._older.extend(items)
+        self.items.extend(items)
+        self._frame = None
+        return items
+
+    def frame(self):
+        """Items as a DataFrame with timestamps parsed in bulk, rebuilt only after a sync"""
+        if self._frame is None:
+            pd = lazy.pandas()
+            frame = pd.DataFrame(self.items, columns=["id", "text", "updateTime"])
+            frame["text"] = frame["text"].fillna("")
+            updated = pd.to_datetime(frame["updateTime"], utc=True, format="ISO8601")
+            frame["updated"] = updated
+            frame["label"] = updated.dt.strftime(DISPLAY_FORMAT)
+            self._frame = frame
+        return self._frame
+
+    def ensure_loaded(self):
+        """Sync once per feed object, unless the stored feed is still fresh (or stale_ok)"""
+        age = time.time() - self._synced_at
+        if not self.synced and age > FRESH_FOR:
+            if self.stale_ok and self.cursor is not None and age <= cache.stale_limits.get("announcement_feed", 0):
+                self.stale = True
+            else:
+                self.sync()
+        self.synced = True
+        return self.items
+
+
+def expire_feed(service, course_id):
+    """Make the next feed object for course_id sync, e.g. after a post"""
+    user = request_user(service)
+    state = cache.get(user, "announcement_feed", course_id)
+    if state:
+        state["synced_at"] = 0
+        cache.put(user, "announcement_feed", course_id, "", state)
+
+
+def add_to_feed(service, course_id, announcement):
+    """Put a just-posted announcement at the top of the stored feed, without syncing
+
+    The cursor stays where it was, so the next sync still fetches everything
+    posted since and replaces this copy.
+    """
+    user = request_user(service)
+    state = cache.get(user, "announcement_feed", course_id)
+    if state:
+        item = {field: announcement.get(field) for field in ANNOUNCEMENT_ITEM.split(",")}
+        state["items"] = [item] + [a for a in state["items"] if a["id"] != item["id"]]
+        cache.put(user, "announcement_feed", course_id, "", state)
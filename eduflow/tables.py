@@ -0,0 +1,57 @@
+"""Columnar tables with a prebuilt search index for large lists"""
+
+from eduflow import lazy
+
+
+class IndexedTable:
+    """Arrow table plus a lowercase search column over chosen fields.
+
+    Built once per fetch; searching, filtering, sorting and paging then run
+    as Arrow kernels instead of Python loops over the rows.
+    """
+
+    def __init__(self, table, search_columns):
+        pa, pc = lazy.pyarrow(), lazy.pyarrow_compute()
+        self.table = table
+        parts = [pc.fill_null(table[c].cast(pa.string()), "") for c in search_columns]
+        if parts:
+            self._search = pc.utf8_lower(pc.binary_join_element_wise(*parts, "\n"))
+        else:
+            self._search = pa.array([""] * table.num_rows, pa.string())
+
+    @classmethod
+    def from_rows(cls, rows, columns, search_columns):
+        """Build from dicts, keeping only columns (all as strings)"""
+        pa = lazy.pyarrow()
+        data = {c: pa.array([row.get(c) for row in rows], pa.string()) for c in columns}
+        return cls(pa.table(data), search_columns)
+
+    def __len__(self):
+        return self.table.num_rows
+
+    def filter(self, query="", **equals):
+        """Rows whose search column contains query and whose columns equal the given values"""
+        pc = lazy.pyarrow_compute()
+        mask = None
+        if query:
+            mask = pc.match_substring(self._search, query.strip().lower())
+        for column, value in equals.items():
+            if value:
+                match = pc.equal(self.table[column], value)
+                mask = match if mask is None else pc.and_(mask, match)
+        if mask is None:
+            return self.table
+        return self.table.filter(pc.fill_null(mask, False))
+
+    def unique(self, column):
+        """Sorted distinct non-null values of a column"""
+        values = lazy.pyarrow_compute().unique(self.table[column].drop_null())
+        return sorted(values.to_pylist())
+
+
+
+def sort_page(table, sort_by=None, descending=False, page=0, page_size=100):
+    """Sort a table and return one page of it"""
+    if sort_by:
+        table = table.sort_by([(sort_by, "descending" if descending else "ascending")])
+    return table.slice(page * page_size, page_size)
@@ -0,0 +1,99 @@
+"""Opt-in span tracing of page reruns.
+
+``trace`` opens a root span for one rerun; ``span`` blocks run inside it
+(on the same thread or context) become its descendants. Outside a trace
+``span`` does nothing but one context variable lookup, so the
+instrumentation can stay in place permanently.
+"""
+
+import contextlib
+import contextvars
+import json
+import os
+import threading
+import time
+
+_current = contextvars.ContextVar("eduflow_span", default=None)
+
+
+class Span:
+    """One timed block with attributes and child spans"""
+
+    __slots__ = ("name", "category", "attrs", "start", "end", "children", "thread")
+
+    def __init__(self, name, category, attrs):
+        self.name = name
+        self.category = category
+        self.attrs = attrs
+        self.start = time.perf_counter()
+        self.end = None
+        self.children = []
+        self.thread = threading.get_ident()
+
+    @property
+    def duration(self):
+        return (self.end or time.perf_counter()) - self.start
+
+    def walk(self, depth=0):
+        """Yield (depth, span) for this span and its descendants, in start order"""
+        yield depth, self
+        for child in self.children:
+            yield from child.walk(depth + 1)
+
+
+@contextlib.contextmanager
+def _open(span):
+    token = _current.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        span.attrs["error"] = type(e).__name__
+        raise
+    finally:
+        span.end = time.perf_counter()
+        _current.reset(token)
+
+
+@contextlib.contextmanager
+def trace(name):
+    """Trace everything run inside the block, yielding the root span"""
+    with _open(Span(name, "rerun", {})) as root:
+        yield root
+
+
+@contextlib.contextmanager
+def span(name, category="render", **attrs):
+    """Record a child of the current span, or nothing when not tracing"""
+    parent = _current.get()
+    if parent is None:
+        yield None
+        return
+    child = Span(name, category, attrs)
+    parent.children.append(child)
+    with _open(child):
+        yield child
+
+
+def annotate(**attrs):
+    """Add attributes to the current span, if tracing"""
+    current = _current.get()
+    if current is not None:
+        current.attrs.update(attrs)
+
+
+def chrome_trace(root):
+    """The span tree in Chrome trace event format, for chrome://tracing or Perfetto"""
+    events = [
+        {
+            "name": s.name,
+            "cat": s.category,
+            "ph": "X",
+            "ts": round((s.start - root.start) * 1e6),
+            "dur": round(s.duration * 1e6),
+            "pid": os.getpid(),
+            "tid": s.thread,
+            "args": {k: str(v) for k, v in s.attrs.items()},
+        }
+        for _, s in root.walk()
+    ]
+    return json.dumps({"traceEvents": events, "displayTimeUnit": "ms"})
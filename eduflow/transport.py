@@ -0,0 +1,109 @@
+"""Pooled, thread-safe HTTP transport for the Google API clients.
+
+httplib2, which googleapiclient uses by default, holds one connection per
+Http object and must not be shared between threads. ``PooledHttp`` offers
+the part of the httplib2.Http interface googleapiclient needs on top of one
+process-wide requests.Session, so every service handle, session and worker
+thread reuses the same keep-alive TLS connections.
+"""
+
+import os
+import socket
+import threading
+
+from eduflow import lazy
+
+# (connect, read) seconds for every request
+TIMEOUT = (
+    float(os.environ.get("EDUFLOW_HTTP_CONNECT_TIMEOUT", "5")),
+    float(os.environ.get("EDUFLOW_HTTP_READ_TIMEOUT", "30")),
+)
+# Keep-alive connections kept per host
+POOL_SIZE = int(os.environ.get("EDUFLOW_HTTP_POOL_SIZE", "32"))
+# Responses after which the access token is refreshed and the request retried once
+REFRESH_STATUSES = (401,)
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def session():
+    """The requests.Session shared by all Google API traffic, created on first use"""
+    global _session
+    if _session is None:
+        requests = lazy.module("requests")
+        with _session_lock:
+            if _session is None:
+                pooled = requests.Session()
+                # Read proxy and CA settings from the environment once, not on every request
+                pooled.proxies = requests.utils.get_environ_proxies("https://www.googleapis.com")
+                pooled.verify = os.environ.get("REQUESTS_CA_BUNDLE") or os.environ.get("CURL_CA_BUNDLE") or True
+                pooled.trust_env = False
+                adapter = requests.adapters.HTTPAdapter(
+                    pool_connections=8, pool_maxsize=POOL_SIZE, max_retries=0
+                )
+                pooled.mount("https://", adapter)
+                pooled.mount("http://", adapter)
+                _session = pooled
+    return _session
+
+
+def _response(response):
+    # requests has already decoded gzip bodies, so drop the encoding headers
+    info = {
+        k.lower(): v for k, v in response.headers.items()
+        if k.lower() not in ("content-encoding", "content-length")
+    }
+    info["status"] = str(response.status_code)
+    return lazy.module("httplib2").Response(info)
+
+
+class PooledHttp:
+    """httplib2.Http stand-in that authorizes requests and sends them over the shared pool"""
+
+    def __init__(self, credentials=None, user_id=None, timeout=TIMEOUT):
+        self.credentials = credentials
+        # Google id of the account the credentials belong to, keys per-user state
+        self.user_id = user_id
+        self.timeout = timeout
+
+    def _refresh(self, force=False):
+        """Renew the access token under the refresher's per-user lock, storing the result"""
+        if self.user_id is None:
+            self.credentials.refresh(lazy.auth_request(session()))
+            return
+        # Imported here as the refresher sends its token requests over this module's pool
+        from eduflow.refresher import refresher
+        creds = refresher.refresh(self.user_id, force=force)
+        if creds is not None:
+            self.credentials = creds
+
+    def request(self, uri, method="GET", body=None, headers=None,
+                redirections=5, connection_type=None, **kwargs):
+        """Send a request, returning (httplib2.Response, content) like httplib2.Http"""
+        refreshed = kwargs.pop("_refreshed", False)
+        request_headers = dict(headers or {})
+        if self.credentials is not None:
+            if not self.credentials.valid:
+                self._refresh()
+            # Adds the bearer token
+            self.credentials.before_request(lazy.auth_request(session()), method, uri, request_headers)
+        requests = lazy.module("requests")
+        try:
+            response = session().request(
+                method, uri, data=body, headers=request_headers,
+                timeout=self.timeout, allow_redirects=redirections > 0,
+            )
+        except requests.Timeout as e:
+            # Same exception types as httplib2, which the scheduler retries
+            raise socket.timeout(str(e)) from e
+        except requests.ConnectionError as e:
+            raise ConnectionError(str(e)) from e
+        if response.status_code in REFRESH_STATUSES and self.credentials is not None and not refreshed:
+            # The token may have been revoked or expired in flight
+            self._refresh(force=True)
+            return self.request(uri, method, body, headers, redirections, connection_type, _refreshed=True)
+        return _response(response), response.content
+
+    def close(self):
+        """Connections belong to the shared pool, nothing to close per handle"""
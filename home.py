@@ -1,8 +1,13 @@
 import streamlit as st
 from streamlit_extras.colored_header import colored_header
 from streamlit_extras.stylable_container import stylable_container
+from eduflow.lazy import start_warmup, warmup_enabled
 import os
 
+# Optional: pre-import the Google stack in the background for the pages
+if warmup_enabled():
+    start_warmup()
+
 # ===== PAGE SETUP =====
 st.set_page_config(
     page_title="EduFlow - Smart Learning Platform",
@@ -1,12 +1,19 @@
 import streamlit as st
-from google_auth_oauthlib.flow import Flow
-from googleapiclient.discovery import build
+from eduflow.assets import assets
+from eduflow.debug_panel import debug_trace, stop
+from eduflow.credentials import store as credential_store
+from eduflow.fields import COURSE_EXISTS
+from eduflow.lazy import oauth_flow, st_lottie, stylable_container
+from eduflow.metrics import render, token_operation
+from eduflow.profile import forget_profile, get_profile
+from eduflow.refresher import refresher
+from eduflow.scheduler import execute
+from eduflow.services import classroom_service
+from eduflow.session import get_credentials, get_user_profile
+from eduflow.tracing import span
 import os
-import pickle
 import base64
-from streamlit_lottie import st_lottie
 import json
-from streamlit_extras.stylable_container import stylable_container
 
 # ===== BACKEND CODE =====
 CLIENT_SECRETS_FILE = "credentials.json"
@@ -28,17 +35,19 @@ SCOPES = [
     'openid'
 ]
 
-TOKEN_FILE = "token.json"
-
 def is_authenticated():
-    if os.path.exists(TOKEN_FILE):
-        with open(TOKEN_FILE, "rb") as token:
-            creds = pickle.load(token)
-            return creds and creds.valid
-    return False
+    refresher.start()
+    creds = get_credentials()
+    if creds and not creds.valid:
+        # Expired before the background refresher got to it, e.g. after a restart
+        try:
+            creds = refresher.refresh(st.session_state.get("user_id"), force=True)
+        except Exception:
+            return False
+    return bool(creds and creds.valid)
 
 def authenticate():
-    flow = Flow.from_client_secrets_file(
+    flow = oauth_flow().from_client_secrets_file(
         CLIENT_SECRETS_FILE, 
         scopes=SCOPES, 
         redirect_uri="urn:ietf:wg:oauth:2.0:oob"
@@ -47,28 +56,28 @@ def authenticate():
     return auth_url
 
 def fetch_token(auth_code):
-    flow = Flow.from_client_secrets_file(
+    flow = oauth_flow().from_client_secrets_file(
         CLIENT_SECRETS_FILE, 
         scopes=SCOPES, 
         redirect_uri="urn:ietf:wg:oauth:2.0:oob"
     )
-    flow.fetch_token(code=auth_code)
+    with token_operation("exchange"):
+        flow.fetch_token(code=auth_code)
     return flow.credentials
 
 def detect_user_role(creds):
     try:
-        classroom = build("classroom", "v1", credentials=creds)
-        results = classroom.courses().list(teacherId="me").execute()
+        classroom = classroom_service(creds)
+        results = execute(classroom.courses().list(teacherId="me", pageSize=1, fields=COURSE_EXISTS))
         return "teacher" if results.get('courses') else "student"
     except Exception:
         return "student"
 
 # ===== UI ENHANCEMENTS =====
 def load_lottie(url):
-    """Load Lottie animation from URL"""
+    """Load Lottie animation from the local asset cache, None until it is available"""
     if url.startswith('http'):
-        import requests
-        return requests.get(url).json()
+        return assets.get(url)
     return json.loads(url)
 
 # Embedded Lottie animation (fallback if no internet)
@@ -159,12 +168,13 @@ def main():
     </style>
     """, unsafe_allow_html=True)
 
-    # Animation at top
-    try:
-        st_lottie(load_lottie("https://assets1.lottiefiles.com/packages/lf20_ktwnwv5m.json"), 
-                 height=200, key="login-anim")
-    except Exception:
-        st_lottie(ANIMATION, height=200, key="login-fallback")
+    # Animation at top, bundled stand-in until the remote one is cached locally
+    with span("animation"):
+        try:
+            st_lottie(load_lottie("https://assets1.lottiefiles.com/packages/lf20_ktwnwv5m.json")
+                      or assets.bundled("fallback-login.json"), height=200, key="login-anim")
+        except Exception:
+            st_lottie(ANIMATION, height=200, key="login-fallback")
 
     # Login card
     with stylable_container(
@@ -184,7 +194,10 @@ def main():
         </div>
         """, unsafe_allow_html=True)
 
-        if not is_authenticated():
+        with span("auth check", "auth"):
+            authenticated = is_authenticated()
+
+        if not authenticated:
             # Google auth section
             auth_url = authenticate()
             st.markdown(f"""
@@ -221,8 +234,11 @@ def main():
                     with st.spinner("Authenticating..."):
                         try:
                             creds = fetch_token(auth_code)
-                            with open(TOKEN_FILE, "wb") as token:
-                                pickle.dump(creds, token)
+                            # Read from the ID token claims, no extra round trip
+                            profile = get_profile(creds)
+                            credential_store.put(profile["id"], creds, email=profile.get("email"))
+                            st.session_state.user_id = profile["id"]
+                            st.session_state.user_profile = profile
                             st.success("✅ Login successful!")
                             st.balloons()
                             st.rerun()
@@ -230,11 +246,9 @@ def main():
                             st.error(f"❌ Error: {str(e)}")
 
         else:  # Authenticated view
-            with open(TOKEN_FILE, "rb") as token:
-                creds = pickle.load(token)
+            creds = get_credentials()
             
-            user_info = build("oauth2", "v2", credentials=creds).userinfo().get().execute()
-            user_email = user_info["email"]
+            user_email = get_user_profile(creds)["email"]
             
             # Check if user needs to select role
             if 'user_role' not in st.session_state:
@@ -270,15 +284,14 @@ def main():
                 
                 # Animation for role selection
                 try:
-                    st_lottie(
-                        load_lottie("https://assets10.lottiefiles.com/packages/lf20_yo4yzvar.json"), 
-                        height=250, 
-                        key="role-select-anim"
-                    )
+                    animation = (load_lottie("https://assets10.lottiefiles.com/packages/lf20_yo4yzvar.json")
+                                 or assets.bundled("fallback-role-select.json"))
+                    if animation:
+                        st_lottie(animation, height=250, key="role-select-anim")
                 except Exception:
                     pass
                 
-                st.stop()  # Don't proceed until role is selected
+                stop()  # Don't proceed until role is selected
             
             # Show welcome message with role
             user_role = st.session_state.user_role
@@ -291,11 +304,10 @@ def main():
             
             # Dashboard animation
             try:
-                st_lottie(
-                    load_lottie("https://assets1.lottiefiles.com/packages/lf20_2cwDXD.json"), 
-                    height=200, 
-                    key="dashboard-anim"
-                )
+                animation = (load_lottie("https://assets1.lottiefiles.com/packages/lf20_2cwDXD.json")
+                             or assets.bundled("fallback-dashboard.json"))
+                if animation:
+                    st_lottie(animation, height=200, key="dashboard-anim")
             except Exception:
                 pass
             
@@ -345,8 +357,10 @@ def main():
                     key="sign_out_btn",
                     use_container_width=True
                 ):
-                    os.remove(TOKEN_FILE)
+                    forget_profile(st.session_state.get("user_id"))
+                    credential_store.delete(st.session_state.get("user_id"))
                     st.session_state.clear()
                     st.rerun()
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    with render("login"), debug_trace("login"):
+        main()
\ No newline at end of file
@@ -1,56 +1,74 @@
 # pages/2_instructor.py
 
 import streamlit as st
-from googleapiclient.discovery import build
-import pickle
-import os
-from datetime import datetime
-from streamlit_lottie import st_lottie
+import math
+import time
+from functools import partial, wraps
+from eduflow.assets import assets
+from eduflow.cache import cache
+from eduflow.credentials import store as credential_store
+from eduflow.debug_panel import debug_trace, stop
+from eduflow.fields import COURSE_CARD, COURSE_DETAIL, ROSTER_ROW, list_mask
+from eduflow.invitations import parse_emails, send_invitations
+from eduflow.lazy import stylable_container
+from eduflow.metrics import render
+from eduflow.pagination import DEFAULT_PAGE_SIZE, PagedList
+from eduflow.prefetch import prefetcher
+from eduflow.profile import forget_profile
+from eduflow.provisioning import COLUMNS as PROVISION_COLUMNS, course_body, provision, read_csv, results_csv
+from eduflow.refresher import needs_refresh, refresher
+from eduflow.revalidate import POLL_INTERVAL, STALE_WHILE_REVALIDATE, describe_age, revalidator
+from eduflow.scheduler import describe_error, execute, request_user
+from eduflow.services import classroom_service
+from eduflow.session import get_credentials, get_user_profile
+from eduflow.sync import AnnouncementFeed, add_to_feed, expire_feed, parse_time
+from eduflow.tables import IndexedTable, sort_page
+from eduflow.tracing import span
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 import json
-from streamlit_extras.stylable_container import stylable_container
 
 # ===== BACKEND FUNCTIONS =====
-TOKEN_FILE = "token.json"
-
-def get_credentials():
-    """Load saved credentials from pickle file"""
-    if os.path.exists(TOKEN_FILE):
-        with open(TOKEN_FILE, "rb") as token:
-            return pickle.load(token)
-    return None
-
 def get_classroom_service():
     """Build Classroom API service"""
     creds = get_credentials()
     if creds:
-        return build("classroom", "v1", credentials=creds)
+        return classroom_service(creds, st.session_state.get("user_id"))
     return None
 
-def list_courses(service):
-    """List all courses where user is instructor"""
-    results = service.courses().list(teacherId="me").execute()
-    return results.get("courses", [])
+def list_courses(service, page_size=DEFAULT_PAGE_SIZE, stale_ok=False):
+    """Page through all courses where user is instructor"""
+    return PagedList(
+        service.courses().list,
+        "courses",
+        page_size,
+        cache_kind="courses",
+        stale_ok=stale_ok,
+        teacherId="me",
+        fields=list_mask("courses", COURSE_CARD)
+    )
+
+def get_course(service, course_id):
+    """Full course for the detail view, fetched lazily and cached"""
+    user = request_user(service)
+    course = cache.get(user, "course", course_id)
+    if course is None:
+        course = execute(service.courses().get(id=course_id, fields=COURSE_DETAIL))
+        cache.put(user, "course", course_id, "", course)
+    return course
 
 def create_course(service, course_title, course_section, description, room):
     """Create a new course"""
-    course = {
-        "name": course_title,
-        "section": course_section,
-        "descriptionHeading": "Welcome to " + course_title,
-        "description": description,
-        "room": room,
-        "ownerId": "me",
-        "courseState": "PROVISIONED"
-    }
-    return service.courses().create(body=course).execute()
+    course = course_body(course_title, course_section, description, room)
+    created = execute(service.courses().create(body=course))
+    # Write through: keep the new course, drop only the course list pages
+    user = request_user(service)
+    cache.put(user, "course", created["id"], "", created)
+    cache.invalidate(user, "courses")
+    return created
 
-def list_announcements(service, course_id):
-    """List announcements for a course"""
-    results = service.courses().announcements().list(
-        courseId=course_id,
-        orderBy="updateTime desc"
-    ).execute()
-    return results.get("announcements", [])
+def list_announcements(service, course_id, page_size=DEFAULT_PAGE_SIZE, stale_ok=False):
+    """Announcement feed for a course, newest first, synced incrementally"""
+    return AnnouncementFeed(service, course_id, page_size, stale_ok)
 
 def create_announcement(service, course_id, text, materials=None):
     """Create a new announcement"""
@@ -60,10 +78,12 @@ def create_announcement(service, course_id, text, materials=None):
     }
     if materials:
         announcement["materials"] = materials
-    return service.courses().announcements().create(
+    created = execute(service.courses().announcements().create(
         courseId=course_id,
         body=announcement
-    ).execute()
+    ))
+    add_to_feed(service, course_id, created)
+    return created
 
 def add_students(service, course_id):
     """Streamlit UI to invite students to a course"""
@@ -79,62 +99,309 @@ def add_students(service, course_id):
             if not emails:
                 st.warning("Please enter email addresses")
             else:
-                email_list = list(set(
-                    e.strip() for line in emails.split('\n') 
-                    for e in line.split(',') if e.strip()
-                ))
+                email_list = parse_emails(emails)
                 
-                results = []
-                for email in email_list:
-                    try:
-                        # Create invitation
-                        invitation = {
-                            'courseId': course_id,
-                            'role': 'STUDENT',
-                            'userId': email
-                        }
-                        # Use the invitations() endpoint instead of students()
-                        service.invitations().create(body=invitation).execute()
-                        results.append((email, "📨 Invitation sent"))
-                    except Exception as e:
-                        if "already exists" in str(e):
-                            results.append((email, "✅ Already enrolled"))
-                        else:
-                            results.append((email, f"❌ Error: {str(e)}"))
+                # Invitations go out in batches, transient failures are retried
+                with st.spinner(f"Sending {len(email_list)} invitations..."):
+                    results = send_invitations(service, course_id, email_list)
                 
                 st.success("Process completed:")
                 for email, status in results:
                     st.write(f"- {email}: {status}")
 
-    # Display current students
-    st.subheader("Enrolled Students")
-    try:
-        students = service.courses().students().list(courseId=course_id).execute().get('students', [])
-        if students:
-            for student in students:
-                st.write(f"- {student['profile']['emailAddress']} (✅ Enrolled)")
+def bulk_create_courses(service):
+    """Streamlit UI to create courses from a CSV file"""
+    with st.expander("📄 Bulk Create from CSV"):
+        st.caption(
+            f"Columns: {', '.join(PROVISION_COLUMNS)}. Separate co-teacher emails with semicolons. "
+            "Rows matching one of your courses by title and section are skipped."
+        )
+        upload = st.file_uploader("Course CSV", type="csv", key="provision_csv")
+        if upload is None:
+            return
+        
+        # The whole file is checked before anything is created
+        rows, problems = read_csv(upload.getvalue())
+        if problems:
+            st.error(f"Found {len(problems)} problems, fix them and upload the file again")
+            st.dataframe([{"line": line, "problem": message} for line, message in problems],
+                         hide_index=True, use_container_width=True)
+            return
+        if not rows:
+            st.warning("The file has no courses")
+            return
+        
+        results_key = f"provision_results_{upload.file_id}"
+        if st.button(f"Create {len(rows)} Courses", disabled=results_key in st.session_state):
+            progress = st.progress(0.0, text="Checking your existing courses...")
+            table = st.empty()
+            results = []
+            try:
+                for result in provision(service, rows):
+                    results.append(result)
+                    progress.progress(len(results) / len(rows), text=f"{len(results)} of {len(rows)} rows done")
+                    table.dataframe(results, hide_index=True, use_container_width=True)
+            except Exception as e:
+                st.error(f"Error creating courses: {describe_error(e)}")
+            st.session_state[results_key] = results
+            drop_course_lists()
+        elif results_key in st.session_state:
+            st.dataframe(st.session_state[results_key], hide_index=True, use_container_width=True)
+        
+        if st.session_state.get(results_key):
+            st.download_button("Download Results", results_csv(st.session_state[results_key]),
+                               file_name="provisioning-results.csv", mime="text/csv")
+
+def list_students(service, course_id, page_size=DEFAULT_PAGE_SIZE, stale_ok=False):
+    """Page through students in a course"""
+    return PagedList(
+        service.courses().students().list,
+        "students",
+        page_size,
+        cache_kind="students",
+        cache_scope=course_id,
+        stale_ok=stale_ok,
+        courseId=course_id,
+        fields=list_mask("students", ROSTER_ROW)
+    )
+
+def roster_table(service, course_id):
+    """The whole roster as an indexed table, built once per fetch"""
+    key = f"roster_{course_id}"
+    if key not in st.session_state:
+        students = list_students(service, course_id, page_size=ROSTER_FETCH_SIZE,
+                                 stale_ok=STALE_WHILE_REVALIDATE)
+        while not students.exhausted:
+            students.load_more()
+        # Only the columnar table is kept, the raw student objects are dropped
+        rows = [
+            {
+                "name": s.get("profile", {}).get("name", {}).get("fullName"),
+                "email": s.get("profile", {}).get("emailAddress"),
+                "userId": s.get("userId"),
+            }
+            for s in students.items
+        ]
+        st.session_state[key] = IndexedTable.from_rows(rows, ROSTER_COLUMNS, ["name", "email"])
+        st.session_state[f"roster_fetched_{course_id}"] = (students.stale, students.fetched_at)
+    return st.session_state[key]
+
+def warm_course(creds, user_id, course_id):
+    """Fetch the announcement and roster heads of a course into the cache"""
+    # Runs on a prefetch worker; pooled handles are safe to share across threads
+    service = classroom_service(creds, user_id)
+    list_announcements(service, course_id).ensure_loaded()
+    list_students(service, course_id, page_size=ROSTER_FETCH_SIZE).ensure_loaded()
+
+def paged_list(key, factory):
+    """Return this session's PagedList for key, loading its first page once"""
+    if key not in st.session_state:
+        paged = factory()
+        paged.ensure_loaded()
+        st.session_state[key] = paged
+    return st.session_state[key]
+
+def drop_course_lists():
+    """Make the card and table course lists reload, e.g. after courses were created"""
+    for key in ("courses", "all_courses"):
+        st.session_state.pop(key, None)
+
+def load_more_button(paged, key):
+    """Offer to fetch the next page of a PagedList"""
+    if not paged.exhausted and st.button("Load more", key=key):
+        try:
+            paged.load_more()
+            rerun_panel()
+        except Exception as e:
+            st.error(f"Error loading more: {describe_error(e)}")
+
+def fragment_run():
+    """True while Streamlit is rerunning fragments only, not the whole page"""
+    ctx = get_script_run_ctx()
+    return bool(ctx and ctx.fragment_ids_this_run)
+
+def rerun_panel():
+    """Rerun just the current fragment, or the page during a full run"""
+    st.rerun(scope="fragment" if fragment_run() else "app")
+
+def request_app_rerun():
+    """Widget callback: have the fragment rerun the whole page"""
+    st.session_state.rerun_app = True
+
+def stale_notice(key, stale, fetched_at, refresh):
+    """Show the age of stale data and swap in fresh data once refresh() has run in the background.
+
+    A small fragment polls the refresh; when it is done the session's copy
+    under key is dropped and the page reruns to rebuild it from the cache.
+    """
+    jobs = st.session_state.setdefault("revalidating", {})
+    if not stale:
+        jobs.pop(key, None)
+        return
+    job = jobs.get(key)
+    # A failed refresh is tried again on the next rerun
+    started = job is None or (job.done() and job.exception() is not None)
+    if started:
+        job = jobs[key] = revalidator.submit((st.session_state.get("user_id"), key), refresh)
+    age = describe_age(time.time() - fetched_at)
+
+    def watch():
+        if not job.done():
+            st.caption(f"🕒 Updated {age} · refreshing…")
+        elif job.exception() is not None:
+            st.caption(f"🕒 Updated {age} · couldn't refresh, showing saved data")
         else:
-            st.info("No students enrolled yet")
-    except Exception as e:
-        st.error(f"Error loading students: {str(e)}")
+            st.session_state.pop(key, None)
+            jobs.pop(key, None)
+            st.rerun()
 
-def list_students(service, course_id):
-    """Safely list students in a course with error handling"""
-    try:
-        results = service.courses().students().list(courseId=course_id).execute()
-        return results.get("students", [])
-    except Exception as e:
-        st.error(f"Error fetching students: {str(e)}")
-        return []
+    # Polling intervals are cleared by every full run, so a fragment rerun
+    # only registers one for a refresh it started itself
+    poll = not job.done() and (started or not fragment_run())
+    st.fragment(watch, run_every=POLL_INTERVAL if poll else None)()
+
+def panel(name):
+    """st.fragment whose own reruns are measured and traced like page reruns"""
+    def decorate(func):
+        @wraps(func)
+        def run(*args, **kwargs):
+            # A full run already reflects the change, only a fragment run needs to widen
+            if st.session_state.pop("rerun_app", False) and fragment_run():
+                st.rerun()
+            if not fragment_run():
+                return func(*args, **kwargs)
+            with render(f"instructor:{name}"), debug_trace(f"instructor:{name}", sidebar=False):
+                return func(*args, **kwargs)
+        return st.fragment(run)
+    return decorate
 
 # ===== UI FUNCTIONS =====
+FEED_WINDOW = 20
+DETAIL_SECTIONS = ["Announcements", "Students", "Course Details"]
+COURSE_COLUMNS = ["name", "section", "room", "courseState", "id"]
+COURSE_SEARCH = ["name", "section", "room", "courseState"]
+ROSTER_COLUMNS = ["name", "email", "userId"]
+ROSTER_PAGE = 100
+# Rosters are fetched whole for the table, in large pages
+ROSTER_FETCH_SIZE = 1000
+# So is the course table
+COURSE_FETCH_SIZE = 1000
+
 def load_lottie(url):
-    """Load Lottie animation from URL or local JSON"""
+    """Load Lottie animation from the local asset cache or local JSON"""
     if url.startswith('http'):
-        import requests
-        return requests.get(url).json()
+        return assets.get(url)
     return json.loads(url)
 
+def announcement_window(feed, course_id, window=FEED_WINDOW):
+    """Render one window of the announcement feed, whatever its length"""
+    page_key = f"feed_page_{course_id}"
+    page = st.session_state.get(page_key, 0)
+    start = page * window
+    frame = feed.frame()
+    # Pull older history only when the window runs past what is held locally
+    try:
+        while len(frame) < start + window and not feed.exhausted:
+            feed.load_more()
+            frame = feed.frame()
+    except Exception as e:
+        st.error(f"Error loading more: {describe_error(e)}")
+    
+    rows = frame.iloc[start:start + window]
+    for text, label in zip(rows["text"], rows["label"]):
+        with st.container():
+            st.markdown(text)
+            st.caption(f"Posted on {label}")
+            st.divider()
+    
+    def go_to(target):
+        st.session_state[page_key] = target
+    
+    has_next = start + window < len(frame) or not feed.exhausted
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col1:
+        st.button("← Newer", key=f"newer_{course_id}", disabled=page == 0,
+                  on_click=go_to, args=(page - 1,))
+    with col2:
+        total = f"{len(frame)}" if feed.exhausted else f"{len(frame)}+"
+        st.caption(f"Showing {start + 1}–{start + len(rows)} of {total}")
+    with col3:
+        st.button("Older →", key=f"older_{course_id}", disabled=not has_next,
+                  on_click=go_to, args=(page + 1,))
+
+def roster_view(table, course_id, page_size=ROSTER_PAGE):
+    """One sorted, filtered page of the roster in a single table widget"""
+    col1, col2, col3 = st.columns([3, 1, 1])
+    with col1:
+        query = st.text_input("Search students", placeholder="Name or email", key=f"roster_search_{course_id}")
+    with col2:
+        sort_by = st.selectbox("Sort by", ["name", "email"], format_func=str.capitalize,
+                               key=f"roster_sort_{course_id}")
+    with col3:
+        descending = st.toggle("Descending", key=f"roster_desc_{course_id}")
+    
+    matches = table.filter(query)
+    pages = max(1, math.ceil(matches.num_rows / page_size))
+    page_key = f"roster_page_{course_id}"
+    if st.session_state.get(page_key, 1) > pages:
+        st.session_state[page_key] = pages
+    
+    st.dataframe(
+        sort_page(matches, sort_by, descending, st.session_state.get(page_key, 1) - 1, page_size),
+        hide_index=True,
+        use_container_width=True,
+        column_config={"name": "Name", "email": "Email", "userId": None}
+    )
+    col1, col2 = st.columns([1, 3])
+    with col1:
+        st.number_input("Page", min_value=1, max_value=pages, key=page_key)
+    with col2:
+        st.caption(f"{matches.num_rows} of {len(table)} students")
+
+def course_grid(courses):
+    """All courses in one searchable table; selecting a row opens the course"""
+    # The table shows every course, so pull any remaining pages first
+    while not courses.exhausted:
+        courses.load_more()
+    
+    # Build the table and its search index once per fetch, not per rerun
+    cached = st.session_state.get("course_table")
+    if not cached or cached[0] is not courses or cached[1] != len(courses.items):
+        table = IndexedTable.from_rows(courses.items, COURSE_COLUMNS, COURSE_SEARCH)
+        st.session_state.course_table = cached = (courses, len(courses.items), table)
+    table = cached[2]
+    
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        query = st.text_input("Search courses", placeholder="Name, section, room or state", key="course_search")
+    with col2:
+        state = st.selectbox("State", ["All"] + table.unique("courseState"), key="course_state_filter")
+    view = table.filter(query, courseState=None if state == "All" else state)
+    
+    grid_key = f"course_grid_{st.session_state.get('course_grid_nonce', 0)}"
+    event = st.dataframe(
+        view,
+        hide_index=True,
+        use_container_width=True,
+        on_select="rerun",
+        selection_mode="single-row",
+        key=grid_key,
+        column_config={
+            "name": "Course",
+            "section": "Section",
+            "room": "Room",
+            "courseState": "State",
+            "id": "ID",
+        }
+    )
+    st.caption(f"{view.num_rows} of {len(table)} courses")
+    if event.selection.rows:
+        course_id = view["id"][event.selection.rows[0]].as_py()
+        st.session_state.current_course = next(c for c in courses.items if c["id"] == course_id)
+        # Fresh widget key so the selection is cleared when coming back to the list
+        st.session_state.course_grid_nonce = st.session_state.get("course_grid_nonce", 0) + 1
+        st.rerun()
+
 def course_card(course):
     """Display a course as a styled card (fixed version)"""
     with stylable_container(
@@ -165,6 +432,7 @@ def course_card(course):
             st.markdown(f"**ID:** `{course['id']}`")
             if st.button("Manage", key=f"manage_{course['id']}"):
                 st.session_state.current_course = course
+                st.rerun()
         
         # Description moved inside the main container with proper styling
         if course.get('description'):
@@ -173,28 +441,207 @@ def course_card(course):
                 unsafe_allow_html=True
             )
 
+@panel("announcements")
+def announcements_panel(service, course):
+    """Announcement form, refresh button and feed of a course"""
+    # Announcements section
+    st.subheader("Announcements")
+
+    with st.expander("Create New Announcement", expanded=False):
+        with st.form("announcement_form"):
+            announcement_text = st.text_area("Announcement Text")
+            submitted = st.form_submit_button("Post Announcement")
+            if submitted and announcement_text:
+                try:
+                    create_announcement(service, course['id'], announcement_text)
+                    st.session_state.pop(f"announcements_{course['id']}", None)
+                    st.success("Announcement posted!")
+                    rerun_panel()
+                except Exception as e:
+                    st.error(f"Error posting announcement: {describe_error(e)}")
+
+    if st.button("🔄 Refresh", key=f"refresh_announcements_{course['id']}"):
+        # A new feed object syncs only what changed since the last sync
+        expire_feed(service, course['id'])
+        st.session_state.pop(f"announcements_{course['id']}", None)
+
+    key = f"announcements_{course['id']}"
+    try:
+        announcements = paged_list(
+            key,
+            lambda: list_announcements(service, course['id'], stale_ok=STALE_WHILE_REVALIDATE)
+        )
+    except Exception as e:
+        st.error(f"Error loading announcements: {describe_error(e)}")
+        stop()
+    stale_notice(key, announcements.stale, announcements.fetched_at,
+                 lambda: list_announcements(service, course['id']).sync())
+    if announcements.items:
+        announcement_window(announcements, course['id'])
+    else:
+        st.info("No announcements yet")
+
+@panel("roster")
+def students_panel(service, course):
+    """Invitations and the roster of a course"""
+    # Add this line to enable student invitations 👇
+    add_students(service, course['id']) 
+
+    # Students section
+    st.subheader("Enrolled Students")
+    if st.button("🔄 Refresh", key=f"refresh_roster_{course['id']}"):
+        cache.invalidate(request_user(service), "students", course['id'])
+        st.session_state.pop(f"roster_{course['id']}", None)
+
+    try:
+        with st.spinner("Loading students..."):
+            roster = roster_table(service, course['id'])
+    except Exception as e:
+        st.error(f"Error fetching students: {describe_error(e)}")
+        stop()
+    stale_notice(
+        f"roster_{course['id']}",
+        *st.session_state.get(f"roster_fetched_{course['id']}", (False, None)),
+        lambda: list_students(service, course['id'], page_size=ROSTER_FETCH_SIZE).revalidate()
+    )
+    if len(roster):
+        roster_view(roster, course['id'])
+    else:
+        st.info("No students enrolled yet")
+
+def details_panel(service, course):
+    """Full course information"""
+    # Course details section
+    st.subheader("Course Information")
+
+    # The list only carries card fields, fetch the full course once per session
+    key = f"details_{course['id']}"
+    try:
+        if key not in st.session_state:
+            st.session_state[key] = get_course(service, course['id'])
+        details = st.session_state[key]
+    except Exception as e:
+        st.error(f"Error loading course details: {describe_error(e)}")
+        stop()
+
+    with stylable_container(
+        key="course_details",
+        css_styles="""
+        {
+            background: white;
+            border-radius: 10px;
+            padding: 1.5rem;
+            margin: 0.5rem 0;
+            box-shadow: 0 2px 8px rgba(0,0,0,0.1);
+        }
+        """
+    ):
+        st.markdown(f"**Course ID:** `{details['id']}`")
+        st.markdown(f"**Status:** {details.get('courseState', 'N/A')}")
+        st.markdown(f"**Created:** {parse_time(details['creationTime']).strftime('%B %d, %Y')}")
+
+        if details.get('descriptionHeading'):
+            st.markdown("---")
+            st.markdown(f"### {details['descriptionHeading']}")
+
+        if details.get('description'):
+            st.markdown(details['description'])
+
+@panel("sidebar")
+def sidebar_panel(creds, user_email):
+    """Account and navigation controls"""
+    st.markdown(f"""
+    <div style="margin-bottom: 2rem;">
+        <h2 style="color: white; margin-bottom: 0.5rem;">EduFlow</h2>
+        <p style="color: rgba(255,255,255,0.8); margin: 0;">{user_email}</p>
+    </div>
+    """, unsafe_allow_html=True)
+
+    if st.button("Create New Course"):
+        st.session_state.show_create_course = True
+        st.session_state.current_course = None
+        st.rerun()
+
+    if st.session_state.current_course:
+        if st.button("Back to All Courses"):
+            st.session_state.current_course = None
+            st.session_state.show_create_course = False
+            st.rerun()
+
+    st.toggle("Compact course table", key="course_table_mode",
+              help="Show all courses in one searchable table", on_change=request_app_rerun)
+
+    st.markdown("---")
+
+    if st.button("Sign Out", key="sidebar_sign_out"):
+        forget_profile(st.session_state.get("user_id"))
+        credential_store.delete(st.session_state.get("user_id"))
+        st.session_state.clear()
+        st.rerun()
+
+@panel("courses")
+def course_list_panel(service, creds):
+    """The instructor's courses as cards or a table"""
+    st.subheader("Your Courses")
+    # Filled in once the courses shown are known, the table may load more pages
+    notice = st.container()
+    table_mode = st.session_state.get("course_table_mode")
+    # The table shows every course, so it has its own list fetched in large pages
+    key, page_size = ("all_courses", COURSE_FETCH_SIZE) if table_mode else ("courses", DEFAULT_PAGE_SIZE)
+
+    with st.spinner("Loading courses..."):
+        try:
+            courses = paged_list(key, lambda: list_courses(service, page_size, stale_ok=STALE_WHILE_REVALIDATE))
+        except Exception as e:
+            st.error(f"Error loading courses: {describe_error(e)}")
+            stop()
+
+        if courses.items and table_mode:
+            try:
+                course_grid(courses)
+            except Exception as e:
+                st.error(f"Error loading courses: {describe_error(e)}")
+        elif courses.items:
+            for course in courses.items:
+                with st.container():
+                    course_card(course)
+            load_more_button(courses, "more_courses")
+        else:
+            st.info("You don't have any courses yet")
+            if st.button("Create Your First Course"):
+                st.session_state.show_create_course = True
+                st.rerun()
+
+    with notice:
+        stale_notice(key, courses.stale, courses.fetched_at,
+                     partial(courses.revalidate, courses.pages_loaded))
+
+    # Warm the likeliest next courses while the list is on screen
+    user = request_user(service)
+    prefetcher.prefetch(user, courses.items, partial(warm_course, creds, user))
+
 # ===== MAIN PAGE =====
 def main():
     # Authentication check
-    if not os.path.exists(TOKEN_FILE):
+    refresher.start()
+    creds = get_credentials()
+    if not creds:
         st.error("Please login first")
-        st.stop()
+        stop()
     
-    try:
-        with open(TOKEN_FILE, "rb") as token:
-            creds = pickle.load(token)
-        
-        # Verify credentials are still valid
+    # Verify credentials are still valid
+    if not creds.valid:
+        # Expired before the background refresher got to it, e.g. after a restart
+        try:
+            creds = refresher.refresh(st.session_state.get("user_id"), force=True)
+        except Exception as e:
+            st.error(f"Invalid session: {str(e)}")
+            stop()
         if not creds or not creds.valid:
             st.error("Session expired, please login again")
-            os.remove(TOKEN_FILE)
-            st.stop()
-            
-    except Exception as e:
-        st.error(f"Invalid session: {str(e)}")
-        if os.path.exists(TOKEN_FILE):
-            os.remove(TOKEN_FILE)
-        st.stop()
+            stop()
+    elif needs_refresh(creds):
+        refresher.nudge()
     # Page config with more stable settings
     st.set_page_config(
         page_title="Instructor Dashboard",
@@ -232,19 +679,8 @@ def main():
     </style>
     """, unsafe_allow_html=True)
 
-    # Check authentication
-    if not os.path.exists(TOKEN_FILE):
-        st.error("You need to login first")
-        st.stop()
-
     # Get user info
-    creds = get_credentials()
-    if not creds:
-        st.error("Failed to load credentials")
-        st.stop()
-        
-    user_info = build("oauth2", "v2", credentials=creds).userinfo().get().execute()
-    user_email = user_info["email"]
+    user_email = get_user_profile(creds)["email"]
 
     # Initialize session state
     if 'current_course' not in st.session_state:
@@ -253,29 +689,8 @@ def main():
         st.session_state.show_create_course = False
 
     # More stable sidebar implementation
-    with st.sidebar:
-        st.markdown(f"""
-        <div style="margin-bottom: 2rem;">
-            <h2 style="color: white; margin-bottom: 0.5rem;">EduFlow</h2>
-            <p style="color: rgba(255,255,255,0.8); margin: 0;">{user_email}</p>
-        </div>
-        """, unsafe_allow_html=True)
-
-        if st.button("Create New Course"):
-            st.session_state.show_create_course = True
-            st.session_state.current_course = None
-
-        if st.session_state.current_course:
-            if st.button("Back to All Courses"):
-                st.session_state.current_course = None
-                st.session_state.show_create_course = False
-
-        st.markdown("---")
-        
-        if st.button("Sign Out", key="sidebar_sign_out"):
-            os.remove(TOKEN_FILE)
-            st.session_state.clear()
-            st.rerun()
+    with st.sidebar, span("sidebar"):
+        sidebar_panel(creds, user_email)
 
     # Main content with more stable rendering
     st.title("Instructor Dashboard")
@@ -284,11 +699,11 @@ def main():
     service = get_classroom_service()
     if not service:
         st.error("Failed to initialize Classroom service")
-        st.stop()
+        stop()
 
     # Course management view - using columns for better layout stability
     if st.session_state.show_create_course:
-        with st.container():
+        with st.container(), span("create course form"):
             st.subheader("Create New Course")
             with st.form("create_course_form"):
                 col1, col2 = st.columns(2)
@@ -305,129 +720,45 @@ def main():
                     with st.spinner("Creating course..."):
                         try:
                             course = create_course(service, course_title, course_section, description, room)
+                            drop_course_lists()
                             st.success(f"Course created successfully! ID: {course['id']}")
                             st.session_state.show_create_course = False
                             st.rerun()
                         except Exception as e:
-                            st.error(f"Error creating course: {str(e)}")
+                            st.error(f"Error creating course: {describe_error(e)}")
+            
+            bulk_create_courses(service)
 
     elif st.session_state.current_course:
-        # Course detail view with more stable tabs implementation
+        # Course detail view, only the selected section runs and fetches
         course = st.session_state.current_course
         with st.container():
             st.markdown(f"## {course['name']}")
             st.caption(f"Section: {course.get('section', 'N/A')} • Room: {course.get('room', 'N/A')}")
             
-            tab1, tab2, tab3 = st.tabs(["Announcements", "Students", "Course Details"])
-            
-            with tab1:
-                # Announcements section
-                st.subheader("Announcements")
-                
-                with st.expander("Create New Announcement", expanded=False):
-                    with st.form("announcement_form"):
-                        announcement_text = st.text_area("Announcement Text")
-                        submitted = st.form_submit_button("Post Announcement")
-                        if submitted and announcement_text:
-                            try:
-                                create_announcement(service, course['id'], announcement_text)
-                                st.success("Announcement posted!")
-                                st.rerun()
-                            except Exception as e:
-                                st.error(f"Error posting announcement: {str(e)}")
-                
-                announcements = list_announcements(service, course['id'])
-                if announcements:
-                    for announcement in announcements:
-                        update_time = datetime.strptime(
-                            announcement['updateTime'], 
-                            "%Y-%m-%dT%H:%M:%S.%fZ"
-                        ).strftime("%B %d, %Y at %H:%M")
-                        
-                        with st.container():
-                            st.markdown(announcement['text'])
-                            st.caption(f"Posted on {update_time}")
-                            st.divider()
-                else:
-                    st.info("No announcements yet")
-            
-            with tab2:
-                # Students section
-                st.subheader("Enrolled Students")
-
-           # Add this line to enable student invitations 👇
-                add_students(service, course['id']) 
-            
-                # Add this line to enable student invitations 👇
-                add_students(service, course['id']) 
-
-                students = list_students(service, course['id'])
-                if students:
-                    for student in students:
-                        with stylable_container(
-                            key=f"student_{student['userId']}",
-                            css_styles="""
-                            {
-                            background: white;
-                            border-radius: 10px;
-                            padding: 1rem;
-                            margin: 0.5rem 0;
-                            box-shadow: 0 2px 8px rgba(0,0,0,0.1);
-                        }
-                        """
-                        ):
-                            col1, col2 = st.columns([1, 3])
-                            with col1:
-                                st.markdown(f"**{student['profile']['name']['fullName']}**")
-                            with col2:
-                                st.markdown(f"`{student['profile']['emailAddress']}`")
-                else:
-                    st.info("No students enrolled yet")
-            
-        
-            with tab3:
-                # Course details section
-                st.subheader("Course Information")
+            section = st.radio(
+                "Section",
+                DETAIL_SECTIONS,
+                horizontal=True,
+                label_visibility="collapsed",
+                key=f"detail_section_{course['id']}"
+            )
             
-                with stylable_container(
-                    key="course_details",
-                    css_styles="""
-                    {
-                    background: white;
-                    border-radius: 10px;
-                    padding: 1.5rem;
-                    margin: 0.5rem 0;
-                    box-shadow: 0 2px 8px rgba(0,0,0,0.1);
-                }
-                """
-                ):
-                    st.markdown(f"**Course ID:** `{course['id']}`")
-                    st.markdown(f"**Status:** {course.get('courseState', 'N/A')}")
-                    st.markdown(f"**Created:** {datetime.strptime(course['creationTime'], '%Y-%m-%dT%H:%M:%S.%fZ').strftime('%B %d, %Y')}")
-                
-                    if course.get('descriptionHeading'):
-                        st.markdown("---")
-                        st.markdown(f"### {course['descriptionHeading']}")
-                
-                    if course.get('description'):
-                        st.markdown(course['description'])
+            if section == "Announcements":
+                with span("announcements panel"):
+                    announcements_panel(service, course)
+            elif section == "Students":
+                with span("students panel"):
+                    students_panel(service, course)
+            else:
+                with span("details panel"):
+                    details_panel(service, course)
 
     else:
         # Course list view with more stable rendering
-        st.subheader("Your Courses")
-        
-        with st.spinner("Loading courses..."):
-            courses = list_courses(service)
-            
-            if courses:
-                for course in courses:
-                    with st.container():
-                        course_card(course)
-            else:
-                st.info("You don't have any courses yet")
-                if st.button("Create Your First Course"):
-                    st.session_state.show_create_course = True
-                    st.rerun()
+        with span("course list"):
+            course_list_panel(service, creds)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    with render("instructor"), debug_trace("instructor"):
+        main()
\ No newline at end of file